@@ -0,0 +1,67 @@
+"""Compare building interaction embeds from scratch with ActionEmbedTemplate
+
+Run from the repository root with ``python -m benchmarks.bench_embeds``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from bot.classes import Translator, UserInteractions
+
+COMMANDS = ["pat", "lick", "poke"]
+EMBEDS = 50_000
+GIF = "https://cdn.discordapp.com/attachments/1/2/pat_1.gif"
+
+
+def run(name: str, build: Callable[[str, int], Any]) -> float:
+    commands = [random.choice(COMMANDS) for _ in range(EMBEDS)]
+
+    start = time.perf_counter()
+    for count, command in enumerate(commands):
+        build(command, count)
+    elapsed = time.perf_counter() - start
+
+    rate = len(commands) / elapsed
+    print(f"{name:<10} {rate:>10,.0f} embeds/sec")
+    return rate
+
+
+async def main() -> None:
+    translator = Translator()
+    await translator.load_translations()
+    interactions = UserInteractions(translator)
+
+    author = SimpleNamespace(display_name="Yuno")
+    target = SimpleNamespace(display_name="Yukiteru")
+
+    async def get_embed(command: str, count: int) -> Any:
+        # What every command did per invocation: look up each translation, then build the embed
+        footer = str(translator.get_translation(f"commands.{command}.footer"))
+        description = random.choice(translator.get_templates(f"commands.{command}.description")).source
+        emoji = str(translator.get_translation(f"commands.{command}.emoji"))
+        return await interactions.get_embed(None, author, target, count, footer, description, emoji, gif=GIF)  # type: ignore
+
+    def before(command: str, count: int) -> Any:
+        # get_embed never suspends, so drive the coroutine by hand instead of paying for the event loop
+        coro = get_embed(command, count)
+        try:
+            coro.send(None)
+        except StopIteration as e:
+            return e.value
+
+    def after(command: str, count: int) -> Any:
+        template = interactions.get_template(command, "en_US")
+        return template.render(author.display_name, target.display_name, count, gif=GIF)
+
+    rate_before = run("before", before)
+    rate_after = run("template", after)
+    print(f"speedup    {rate_after / rate_before:>10.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,350 @@
+"""Push synthetic messages through Yuno.on_message, get_prefix, get_context and invoke
+
+Runs offline: the bot gets an in-memory fake of the asyncpg pool, and its HTTP
+client answers every request with a canned payload without touching the
+network. Run from the repository root with ``python -m benchmarks.bench_pipeline``.
+
+Scenarios:
+
+* ``dm``: a command in a DM, where the default prefixes are used
+* ``cached guild``: a command in a guild whose prefixes and row are cached
+* ``uncached guild``: a command in a guild seen for the first time, loading both
+* ``cooldown``: a command rejected by its rate limit
+* ``no prefix``: a guild message that isn't a command
+
+Each scenario is run ``--rounds`` times after a warm-up round. Like ``timeit``,
+the best round's throughput is reported, as the slower ones mostly measure
+other processes on the machine; p50/p99 latency are over every round. Allocations are
+measured in a separate, shorter pass with tracemalloc, as it slows everything
+down: ``peak`` is the memory a single message needs at its busiest,
+``retained`` what is still held once it's done. ``--save`` writes the results
+as JSON and ``--compare`` prints the change against such a file, e.g. one saved
+on the previous commit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import itertools
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import orjson
+
+# Config parses OWNER_IDS on import
+os.environ.setdefault("OWNER_IDS", "1")
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+
+import discord
+from discord.ext import commands
+
+from bot.classes import YGuild
+from bot.main import Yuno, get_intents
+from bot.utils import FakeRecord, ratelimit
+
+BOT_ID = 1000
+AUTHOR_ID = 2000
+CACHED_GUILD_ID = 3000
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+USER = {"id": str(BOT_ID), "username": "yuno", "discriminator": "0", "avatar": None, "global_name": None, "bot": True}
+AUTHOR = {"id": str(AUTHOR_ID), "username": "yukiteru", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+class FakeConnection:
+    """Answers every query with an empty result"""
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> list[Any]:
+        return []
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> None:
+        return None
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> None:
+        return None
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return "SELECT 0"
+
+
+class _Acquire:
+    def __init__(self, conn: FakeConnection) -> None:
+        self.conn = conn
+
+    async def __aenter__(self) -> FakeConnection:
+        return self.conn
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+
+class FakePool(FakeConnection):
+    """Enough of asyncpg.Pool for the bot, counting the round-trips it would make"""
+
+    def __init__(self) -> None:
+        self.conn = FakeConnection()
+        self.db_calls = 0
+
+    def acquire(self) -> _Acquire:
+        self.db_calls += 1
+        return _Acquire(self.conn)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> list[Any]:
+        self.db_calls += 1
+        return []
+
+    def get_size(self) -> int:
+        return 1
+
+    def get_idle_size(self) -> int:
+        return 1
+
+    def get_max_size(self) -> int:
+        return 1
+
+    async def close(self) -> None:
+        pass
+
+
+def message_payload(message_id: int, channel_id: int, content: str, guild_id: Optional[int]) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "author": AUTHOR,
+        "content": content,
+        "timestamp": TIMESTAMP,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+    if guild_id is not None:
+        data["guild_id"] = str(guild_id)
+        data["member"] = {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False}
+
+    return data
+
+
+def stub_http(bot: Yuno, ids: Iterator[int]) -> None:
+    """Answer every Discord API request without the network
+
+    Sent messages and opened DMs get a payload so ``send`` and ``create_dm``
+    can build their objects; anything else gets None.
+    """
+    user = {**USER, "id": str(bot.user.id)} if bot.user is not None else USER
+
+    async def request(route: Any, **kwargs: Any) -> Any:
+        if route.method == "POST" and route.path.endswith("/messages"):
+            payload = message_payload(next(ids), route.channel_id, "pong", None)
+            payload["author"] = user
+            return payload
+        if route.method == "POST" and route.path == "/users/@me/channels":
+            recipient = {**AUTHOR, "id": str(kwargs["json"]["recipient_id"])}
+            return {"id": str(next(ids)), "type": 1, "recipients": [recipient]}
+        return None
+
+    bot.http.request = request  # type: ignore
+
+
+class BenchCog(commands.Cog):
+    def __init__(self, bot: Yuno) -> None:
+        self.bot = bot
+
+    @commands.command()
+    async def ping(self, ctx: commands.Context[Yuno]) -> None:
+        if ctx.guild is not None:
+            await self.bot.find_guild(ctx.guild.id)
+        await ctx.send("pong")
+
+    @commands.command()
+    @ratelimit(rate=1, per=3600)
+    async def limited(self, ctx: commands.Context[Yuno]) -> None:
+        await ctx.send("pong")
+
+
+class Pipeline:
+    """A bot wired to fakes, and a factory for the messages of each scenario"""
+
+    def __init__(self, bot: Yuno, pool: FakePool) -> None:
+        self.bot = bot
+        self.pool = pool
+        self.state = bot._connection
+        self.ids = itertools.count(10_000_000)
+
+        self.state.user = discord.ClientUser(state=self.state, data=USER)  # type: ignore
+        self.dm = discord.DMChannel(
+            me=self.state.user, state=self.state, data={"id": str(next(self.ids)), "type": 1, "recipients": [AUTHOR]}
+        )
+        self.cached = self.channel(CACHED_GUILD_ID)
+
+    @classmethod
+    async def create(cls) -> Pipeline:
+        pool = FakePool()
+        bot = Yuno("token", "postgresql://bench", pool, intents=get_intents())  # type: ignore
+        # What login() does before connecting; dispatching events needs the loop
+        await bot._async_setup_hook()
+        self = cls(bot, pool)
+
+        stub_http(bot, self.ids)
+        bot.cached_prefixes.set_mentions(BOT_ID)
+        # The default handler would log a traceback for every rejected command
+        bot.add_listener(self._ignore_error, "on_command_error")
+        await bot.add_cog(BenchCog(bot))
+
+        # What warm-up would have loaded
+        bot.cached_guilds[CACHED_GUILD_ID] = YGuild(
+            FakeRecord({"guild_id": CACHED_GUILD_ID, "locale": "en_US", "added_at": discord.utils.utcnow()})  # type: ignore
+        )
+        bot.cached_prefixes.set(CACHED_GUILD_ID, ["y", "yuno!"])
+        return self
+
+    @staticmethod
+    async def _ignore_error(ctx: commands.Context[Yuno], error: Exception) -> None:
+        pass
+
+    def channel(self, guild_id: int) -> discord.TextChannel:
+        guild = discord.Guild(data={"id": str(guild_id), "name": "bench"}, state=self.state)  # type: ignore
+        return discord.TextChannel(
+            state=self.state,
+            guild=guild,
+            data={  # type: ignore
+                "id": str(next(self.ids)),
+                "type": 0,
+                "name": "general",
+                "position": 0,
+                "guild_id": str(guild_id),
+            },
+        )
+
+    def message(self, channel: discord.abc.Messageable, content: str) -> discord.Message:
+        guild = getattr(channel, "guild", None)
+        data = message_payload(next(self.ids), channel.id, content, guild.id if guild else None)  # type: ignore
+        return discord.Message(state=self.state, channel=channel, data=data)  # type: ignore
+
+    def scenarios(self) -> dict[str, Callable[[], discord.Message]]:
+        return {
+            "dm": lambda: self.message(self.dm, "y ping"),
+            "cached guild": lambda: self.message(self.cached, "y ping"),
+            "uncached guild": lambda: self.message(self.channel(next(self.ids)), "y ping"),
+            "cooldown": lambda: self.message(self.cached, "y limited"),
+            "no prefix": lambda: self.message(self.cached, "just chatting, nothing to see here"),
+        }
+
+
+class Result(NamedTuple):
+    rate: float
+    p50: float
+    p99: float
+    peak: float
+    retained: float
+    db_calls: float
+
+
+async def process(bot: Yuno, messages: list[discord.Message]) -> list[float]:
+    latencies: list[float] = []
+    for message in messages:
+        start = time.perf_counter()
+        await bot.on_message(message)
+        latencies.append(time.perf_counter() - start)
+        # Lets the tasks dispatched for the message run, e.g. on_command_error
+        await asyncio.sleep(0)
+
+    return latencies
+
+
+async def measure_allocations(bot: Yuno, messages: list[discord.Message]) -> tuple[float, float]:
+    peaks: list[int] = []
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    for message in messages:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await bot.on_message(message)
+        await asyncio.sleep(0)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(peaks), (after - before) / len(messages)
+
+
+async def run(
+    pipeline: Pipeline, make: Callable[[], discord.Message], messages: int, rounds: int, alloc_messages: int
+) -> Result:
+    bot = pipeline.bot
+    await process(bot, [make() for _ in range(messages // 10)])
+
+    rates: list[float] = []
+    latencies: list[float] = []
+    db_calls = 0
+    for _ in range(rounds):
+        batch = [make() for _ in range(messages)]
+        gc.collect()
+
+        db_calls_before = pipeline.pool.db_calls
+        start = time.perf_counter()
+        latencies += await process(bot, batch)
+        rates.append(messages / (time.perf_counter() - start))
+        db_calls += pipeline.pool.db_calls - db_calls_before
+
+    latencies.sort()
+    peak, retained = await measure_allocations(bot, [make() for _ in range(alloc_messages)])
+    return Result(
+        rate=max(rates),
+        p50=latencies[len(latencies) // 2] * 1e6,
+        p99=latencies[int(len(latencies) * 0.99)] * 1e6,
+        peak=peak / 1024,
+        retained=retained,
+        db_calls=db_calls / (messages * rounds),
+    )
+
+
+def print_result(name: str, result: Result, baseline: Optional[dict[str, float]]) -> None:
+    line = (
+        f"{name:<15} {result.rate:>10,.0f} msg/s   p50 {result.p50:>7.1f}us   p99 {result.p99:>7.1f}us   "
+        f"peak {result.peak:>6.1f} KiB   retained {result.retained:>7.1f} B   {result.db_calls:.1f} db calls/msg"
+    )
+    if baseline is not None:
+        line += f"   {result.rate / baseline['rate'] - 1:>+7.1%} msg/s"
+    print(line)
+
+
+async def main(args: argparse.Namespace) -> None:
+    pipeline = await Pipeline.create()
+    # The bot and its caches live for the whole run, don't let every collection walk them
+    gc.collect()
+    gc.freeze()
+    baseline = orjson.loads(args.compare.read_bytes()) if args.compare else {}
+
+    results: dict[str, Result] = {}
+    for name, make in pipeline.scenarios().items():
+        results[name] = await run(pipeline, make, args.messages, args.rounds, args.alloc_messages)
+        print_result(name, results[name], baseline.get(name))
+
+    if args.save:
+        args.save.write_bytes(
+            orjson.dumps({name: result._asdict() for name, result in results.items()}, option=orjson.OPT_INDENT_2)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5_000, help="messages per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--alloc-messages", type=int, default=500, help="messages in the tracemalloc pass")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="a JSON file written by --save to compare against")
+
+    asyncio.run(main(parser.parse_args()))
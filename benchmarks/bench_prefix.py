@@ -0,0 +1,98 @@
+"""Compare the regex based prefix matching with PrefixIndex
+
+Run from the repository root with ``python -m benchmarks.bench_prefix``.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from discord.ext import commands
+
+from bot.utils import PrefixIndex
+
+BOT_ID = 1234567890
+GUILDS = 1000
+MESSAGES = 200_000
+
+
+def make_messages(n: int) -> list[Any]:
+    rng = random.Random(0)
+    contents = ["y pat @someone", "Y help", "yuno!ping", "hello there, nothing to see", f"<@{BOT_ID}> help"]
+
+    messages = []
+    for _ in range(n):
+        guild = None if rng.random() < 0.1 else SimpleNamespace(id=rng.randrange(GUILDS))
+        messages.append(SimpleNamespace(content=rng.choice(contents), guild=guild))
+
+    return messages
+
+
+def regex_path(bot: Any, guild_prefixes: dict[int, list[str]]) -> Callable[[Any], Any]:
+    """The get_prefix implementation before PrefixIndex"""
+    compiled = {
+        guild_id: re.compile("|".join(re.escape(p) for p in prefixes), re.I) for guild_id, prefixes in guild_prefixes.items()
+    }
+
+    def get_prefix(message: Any) -> Any:
+        if message.guild is None:
+            if match := re.match(re.escape('y'), message.content, re.I):
+                return match.group(0)
+
+            return commands.when_mentioned_or(*("y", "y "))(bot, message)
+
+        if match := compiled[message.guild.id].match(message.content):
+            return match.group(0)
+
+        return commands.when_mentioned(bot, message)
+
+    return get_prefix
+
+
+def index_path(guild_prefixes: dict[int, list[str]]) -> Callable[[Any], Any]:
+    index = PrefixIndex(default=("y",))
+    index.set_mentions(BOT_ID)
+    for guild_id, prefixes in guild_prefixes.items():
+        index.set(guild_id, prefixes)
+
+    def get_prefix(message: Any) -> Any:
+        if message.guild is None:
+            prefixes = index.default
+        else:
+            prefixes = index.get(message.guild.id)
+
+        if prefix := index.match(message.content, prefixes):  # type: ignore
+            return prefix
+
+        return index.mentions
+
+    return get_prefix
+
+
+def run(name: str, get_prefix: Callable[[Any], Any], messages: list[Any]) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        get_prefix(message)
+    elapsed = time.perf_counter() - start
+
+    rate = len(messages) / elapsed
+    print(f"{name:<8} {rate:>12,.0f} messages/sec")
+    return rate
+
+
+def main() -> None:
+    bot = SimpleNamespace(user=SimpleNamespace(id=BOT_ID))
+    guild_prefixes = {guild_id: ["y", "yuno!"] if guild_id % 3 else ["y"] for guild_id in range(GUILDS)}
+    messages = make_messages(MESSAGES)
+
+    before = run("regex", regex_path(bot, guild_prefixes), messages)
+    after = run("index", index_path(guild_prefixes), messages)
+    print(f"speedup  {after / before:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
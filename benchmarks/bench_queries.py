@@ -0,0 +1,131 @@
+"""Compare per-query latency with and without the statement warm-up from bot.utils.queries
+
+Needs a Postgres the migrations can run against. Run from the repository root with
+``python -m benchmarks.bench_queries``; the DSN is read from ``BENCH_DSN`` or the
+usual POSTGRES_* settings.
+
+Three pools run the same lookups, each call checking a connection out of the
+pool like the bot does. Every pool runs ``ROUNDS`` times in a rotating order;
+p50 is the best round's, p99 is over every round.
+
+* ``implicit``: asyncpg's default statement cache, what the bot used before
+* ``warmed``: the same cache, with every registered query prepared into it by
+  ``prepare_queries`` in ``init``
+* ``no cache``: ``statement_cache_size=0``, every call is parsed and planned again,
+  which is what happens when a statement falls out of asyncpg's cache
+
+Once a statement is cached, ``warmed`` and ``implicit`` run the same code, so
+the warm-up can only show in the first call on a new connection. That is timed
+separately, over ``CONNECTIONS`` fresh connections.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+
+from bot.config import Config
+from bot.utils import apply_migrations, prepare_queries, queries
+
+CALLS = 5_000
+ROUNDS = 5
+USERS = 1_000
+CONNECTIONS = 50
+
+Call = Callable[[asyncpg.Pool, int], Awaitable[Any]]
+
+
+async def setup(dsn: str) -> None:
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=1)
+    await apply_migrations(pool)
+    await pool.execute("INSERT INTO users (user_id) SELECT generate_series(1, $1) ON CONFLICT DO NOTHING", USERS)
+    await pool.close()
+
+
+async def run(pool: asyncpg.Pool, call: Call, calls: int) -> list[float]:
+    # Every call checks a connection out of the pool, like the bot's lookups do
+    latencies: list[float] = []
+    for i in range(calls):
+        start = time.perf_counter()
+        await call(pool, i % USERS + 1)
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+async def compare(pools: dict[str, tuple[asyncpg.Pool, Call]]) -> dict[str, float]:
+    """Run every pool ``ROUNDS`` times, rotating the order, and return the best p50 of each"""
+    for pool, call in pools.values():
+        await run(pool, call, CALLS // 10)
+
+    p50s: dict[str, list[float]] = {name: [] for name in pools}
+    latencies: dict[str, list[float]] = {name: [] for name in pools}
+    names = list(pools)
+    for i in range(ROUNDS):
+        for name in names[i % len(names) :] + names[: i % len(names)]:
+            pool, call = pools[name]
+            round_latencies = await run(pool, call, CALLS)
+            p50s[name].append(statistics.median(round_latencies))
+            latencies[name] += round_latencies
+
+    best: dict[str, float] = {}
+    for name in names:
+        best[name] = min(p50s[name]) * 1e6
+        all_latencies = sorted(latencies[name])
+        p99 = all_latencies[int(len(all_latencies) * 0.99)] * 1e6
+        print(f"{name:<10} p50 {best[name]:>8.1f}us   p99 {p99:>8.1f}us")
+
+    return best
+
+
+async def first_call(dsn: str, init: Any, call: Call) -> float:
+    """The median latency of the first call on a new connection, in microseconds"""
+    latencies: list[float] = []
+    for i in range(CONNECTIONS):
+        pool = await asyncpg.create_pool(dsn, min_size=1, max_size=1, init=init)
+        start = time.perf_counter()
+        await call(pool, i % USERS + 1)
+        latencies.append(time.perf_counter() - start)
+        await pool.close()
+
+    return statistics.median(latencies) * 1e6
+
+
+async def main() -> None:
+    dsn = os.getenv("BENCH_DSN") or Config.get_dsn()
+    await setup(dsn)
+
+    implicit = await asyncpg.create_pool(dsn, min_size=1, max_size=1)
+    warmed = await asyncpg.create_pool(dsn, min_size=1, max_size=1, init=prepare_queries)
+    no_cache = await asyncpg.create_pool(dsn, min_size=1, max_size=1, statement_cache_size=0)
+
+    for query, args in (
+        (queries.GET_USER, lambda i: (i,)),
+        (queries.GET_GUILD_LOCALE, lambda i: (i,)),
+        (queries.GET_ACTION_COUNT, lambda i: (i, i + 1, "pat")),
+    ):
+        print(query.name)
+        p50 = await compare(
+            {
+                "implicit": (implicit, lambda pool, i: pool.fetchrow(query.sql, *args(i))),
+                "warmed": (warmed, lambda pool, i: queries.fetchrow(pool, query, *args(i))),
+                "no cache": (no_cache, lambda pool, i: pool.fetchrow(query.sql, *args(i))),
+            }
+        )
+        speedup = p50["implicit"] / p50["warmed"]
+        print(f"warmed vs implicit  {speedup:.2f}x   (vs no cache {p50['no cache'] / p50['warmed']:.2f}x)")
+
+        call: Call = lambda pool, i: queries.fetchrow(pool, query, *args(i))
+        cold, warm = await first_call(dsn, None, call), await first_call(dsn, prepare_queries, call)
+        print(f"first call  implicit {cold:.1f}us   warmed {warm:.1f}us   {cold / warm:.2f}x\n")
+
+    await asyncio.gather(implicit.close(), warmed.close(), no_cache.close())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,221 @@
+"""Replay a gateway recording through the bot's parsers and listeners, offline
+
+Record with ``GATEWAY_RECORD_FILE=recording.jsonl.gz`` set on a running bot,
+then run from the repository root with
+``python -m benchmarks.bench_replay recording.jsonl.gz``.
+
+The bot loads its real cogs and translations, but talks to the in-memory pool
+and the stubbed HTTP client of ``bench_pipeline``. Every recorded dispatch is
+passed to its parser in ``ConnectionState.parsers``, and its latency is the
+time until the parser and every listener task it started, including ones
+started by those listeners in turn, have finished.
+
+By default events are fed one after another as fast as they complete, which
+makes runs comparable across commits. ``--speed 1`` keeps the recorded gaps
+between events, so listeners overlap the way they did in production; ``2``
+replays twice as fast and so on. READY only sets the bot user and the guild
+stubs, the shard bookkeeping it would start needs a websocket. For the same
+reason anything that talks to the gateway, like ``Guild.query_members``, shows
+up in the report's errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import contextvars
+import gc
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+os.environ.setdefault("OWNER_IDS", "1")
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+# Replaying must not record the replay
+os.environ["GATEWAY_RECORD_FILE"] = ""
+
+import discord
+
+from bot.main import Yuno, get_intents
+from bot.utils import RecordedEvent, read_recording
+from bot.utils.metrics import DEFAULT_BUCKETS, FAST_BUCKETS, Histogram, HistogramChild
+
+from .bench_pipeline import FakePool, stub_http
+
+BUCKETS = FAST_BUCKETS + DEFAULT_BUCKETS[5:]
+
+_listener_tasks: contextvars.ContextVar[Optional[list[asyncio.Task[Any]]]] = contextvars.ContextVar(
+    "listener_tasks", default=None
+)
+
+
+class Replay:
+    """A bot wired to fakes, and the latency of every event fed to it"""
+
+    def __init__(self, bot: Yuno, pool: FakePool) -> None:
+        self.bot = bot
+        self.pool = pool
+        self.state = bot._connection
+        self.latency = Histogram("replay_event_seconds", "", ("event",), buckets=BUCKETS)
+        self.latencies: collections.defaultdict[str, list[float]] = collections.defaultdict(list)
+        self.errors: collections.Counter[str] = collections.Counter()
+        self.first_errors: dict[str, str] = {}
+        self.ids = itertools.count(1 << 60)
+        self.skipped: collections.Counter[str] = collections.Counter()
+        self._pending: set[asyncio.Task[None]] = set()
+
+    @classmethod
+    async def create(cls) -> Replay:
+        pool = FakePool()
+        bot = Yuno("token", "postgresql://replay", pool, intents=get_intents())  # type: ignore
+        await bot._async_setup_hook()
+        self = cls(bot, pool)
+
+        schedule_event = bot._schedule_event
+
+        def track(*args: Any, **kwargs: Any) -> asyncio.Task[Any]:
+            task = schedule_event(*args, **kwargs)
+            if (tasks := _listener_tasks.get()) is not None:
+                tasks.append(task)
+            return task
+
+        async def on_error(event_method: str, *args: Any, **kwargs: Any) -> None:
+            self._error(event_method, sys.exc_info()[1])
+
+        stub_http(bot, self.ids)
+        bot._schedule_event = track  # type: ignore
+        bot.on_error = on_error  # type: ignore
+        bot.add_listener(self._on_command_error, "on_command_error")
+
+        await bot.translator.load_translations()
+        await bot._load_cogs()
+        return self
+
+    def _error(self, name: str, error: Optional[BaseException]) -> None:
+        self.errors[name] += 1
+        self.first_errors.setdefault(name, repr(error))
+
+    async def _on_command_error(self, ctx: Any, error: Exception) -> None:
+        self._error(f"command {ctx.command}", getattr(error, "original", error))
+
+    def _ready(self, data: dict[str, Any]) -> None:
+        self.state.user = discord.ClientUser(state=self.state, data=data["user"])  # type: ignore
+        self.bot.shard_count = self.state.shard_count = data.get("shard", [0, 1])[1]
+        for guild in data.get("guilds", []):
+            self.state._add_guild_from_data(guild)  # type: ignore
+
+        self.bot.cached_prefixes.set_mentions(self.state.user.id)
+        # Sent messages are authored by the recorded user from now on
+        stub_http(self.bot, self.ids)
+
+    async def _drain(self, tasks: list[asyncio.Task[Any]]) -> None:
+        # Listeners may dispatch more events, which land in the same list
+        done = 0
+        while done < len(tasks):
+            batch = tasks[done:]
+            done = len(tasks)
+            await asyncio.gather(*batch, return_exceptions=True)
+
+    async def _feed(self, recorded: RecordedEvent, series: HistogramChild) -> None:
+        if recorded.event == "READY":
+            return self._ready(recorded.data)
+
+        if (parser := self.state.parsers.get(recorded.event)) is None:
+            self.skipped[recorded.event] += 1
+            return
+
+        tasks: list[asyncio.Task[Any]] = []
+        token = _listener_tasks.set(tasks)
+        start = time.perf_counter()
+        try:
+            parser(recorded.data)
+        except Exception as e:
+            self._error(f"parse {recorded.event}", e)
+        finally:
+            _listener_tasks.reset(token)
+
+        await self._drain(tasks)
+        elapsed = time.perf_counter() - start
+        series.observe(elapsed)
+        self.latencies[recorded.event].append(elapsed)
+
+    async def run(self, events: list[RecordedEvent], speed: float) -> float:
+        """Feed every event and return the wall time it took"""
+        series = {name: self.latency.labels(name) for name in {event.event for event in events}}
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        for event in events:
+            if speed <= 0:
+                await self._feed(event, series[event.event])
+                continue
+
+            if (delay := start + event.at / speed - loop.time()) > 0:
+                await asyncio.sleep(delay)
+
+            task = asyncio.create_task(self._feed(event, series[event.event]))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+        await asyncio.gather(*self._pending)
+        return loop.time() - start
+
+
+def _percentile(latencies: list[float], fraction: float) -> float:
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def print_report(replay: Replay, wall: float) -> None:
+    total = sum(len(latencies) for latencies in replay.latencies.values())
+    print(f"{total:,} events in {wall:.2f}s, {total / wall:,.0f} events/sec\n")
+
+    print(f"{'event':<28} {'count':>8} {'p50':>10} {'p99':>10} {'max':>10}")
+    for event, latencies in sorted(replay.latencies.items(), key=lambda item: -len(item[1])):
+        latencies.sort()
+        print(
+            f"{event:<28} {len(latencies):>8,} {_percentile(latencies, 0.5) * 1e6:>8.1f}us "
+            f"{_percentile(latencies, 0.99) * 1e6:>8.1f}us {latencies[-1] * 1e6:>8.1f}us"
+        )
+
+    print("\nLatency histogram, all events")
+    counts = [0] * (len(BUCKETS) + 1)
+    for _, series in replay.latency._children.values():
+        counts = [a + b for a, b in zip(counts, series.counts)]
+
+    widest = max(counts) or 1
+    for bound, count in zip((*BUCKETS, float("inf")), counts):
+        label = f"<= {bound * 1e3:g}ms" if bound != float("inf") else "> " + f"{BUCKETS[-1] * 1e3:g}ms"
+        print(f"{label:>14} {count:>8,} {'#' * round(count / widest * 50)}")
+
+    if replay.errors:
+        print("\nErrors, with the first of each:")
+        for name, count in replay.errors.most_common():
+            print(f"  {name} x{count}: {replay.first_errors[name]}")
+    if replay.skipped:
+        print("Events without a parser: " + ", ".join(f"{name} x{count}" for name, count in replay.skipped.items()))
+
+
+async def main(args: argparse.Namespace) -> None:
+    events = list(read_recording(args.recording))
+    if args.limit:
+        events = events[: args.limit]
+
+    replay = await Replay.create()
+    gc.collect()
+    gc.freeze()
+
+    wall = await replay.run(events, args.speed)
+    print_report(replay, wall)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path, help="a file written by GatewayRecorder")
+    parser.add_argument("--speed", type=float, default=0, help="1 for the recorded pace, 0 for as fast as possible")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N events")
+
+    asyncio.run(main(parser.parse_args()))
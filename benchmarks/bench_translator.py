@@ -0,0 +1,81 @@
+"""Compare the nested-dict translation lookup with the flat TranslationIndex
+
+Run from the repository root with ``python -m benchmarks.bench_translator``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable
+
+from bot.classes import Translator
+
+KEYS = [
+    "commands.time.message",
+    "commands.userset.subcommands.timezone.success",
+    "commands.leaderboard.message",
+    "errors.command_on_cooldown",
+    "general.welcome_message.footer",
+]
+KWARGS: dict[str, Any] = {
+    "time": "5 pm",
+    "user": "Yuno",
+    "timezone": "Europe/Berlin",
+    "n": 10,
+    "interaction": "pat",
+    "leaderboard": "...",
+}
+CALLS = 200_000
+
+
+def tree_walk(translations: dict[str, Any]) -> Callable[[str, str], str]:
+    """Translator.get_translation before the flat index"""
+
+    def get_translation(key: str, locale: str = "en_US") -> str:
+        if locale not in translations:
+            raise ValueError(f"Locale '{locale}' not supported.")
+
+        current_node = translations[locale]
+        for part in key.split("."):
+            if part not in current_node:
+                raise KeyError(f"Key '{part}' not found in translation file.")
+            current_node = current_node[part]
+
+        if not isinstance(current_node, str):
+            raise ValueError("Key does not point to a string value.")
+
+        return current_node
+
+    return get_translation
+
+
+def run(name: str, func: Callable[[str], Any]) -> float:
+    keys = KEYS * (CALLS // len(KEYS))
+
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    elapsed = time.perf_counter() - start
+
+    rate = len(keys) / elapsed
+    print(f"{name:<28} {rate:>12,.0f} calls/sec")
+    return rate
+
+
+async def main() -> None:
+    translator = Translator()
+    await translator.load_translations()
+    walk = tree_walk(translator.translations)  # type: ignore
+
+    lookup_before = run("lookup (tree walk)", lambda key: walk(key, "en_US"))
+    lookup_after = run("lookup (flat index)", lambda key: translator.get_translation(key, "en_US"))
+    format_before = run("lookup + format (tree walk)", lambda key: walk(key, "en_US").format(**KWARGS))
+    format_after = run("lookup + format (template)", lambda key: translator.get_template(key, "en_US").format(**KWARGS))
+
+    print(f"lookup speedup  {lookup_after / lookup_before:.2f}x")
+    print(f"format speedup  {format_after / format_before:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
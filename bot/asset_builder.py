@@ -0,0 +1,182 @@
+"""Offline re-encoding of the bundled GIFs into smaller variants
+
+Run with ``python run.py assets build``. Every GIF in ``bot/classes/data/images``
+is re-encoded into a size-capped, palette-trimmed GIF and an animated WebP.
+The results and their sizes and hashes are written to ``build/manifest.json``
+next to the images, which ``AssetManager`` reads at runtime. Sources whose hash
+and build parameters match the manifest are skipped.
+
+Requires Pillow, which the bot itself doesn't need: ``pip install Pillow``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+from .classes.assets import (
+    BUILD_DIRECTORY,
+    IMAGE_DIRECTORY,
+    MANIFEST_NAME,
+    MANIFEST_VERSION,
+    Manifest,
+    SourceEntry,
+    VariantEntry,
+    load_manifest,
+)
+
+__all__: tuple[str, ...] = ("build_assets",)
+
+log = logging.getLogger(__name__)
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _encode(source: Path, output: Path, max_side: int, colors: int) -> SourceEntry:
+    """Re-encode one GIF; runs in a worker process"""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError as e:
+        raise RuntimeError("Building assets requires Pillow: pip install Pillow") from e
+
+    data = source.read_bytes()
+
+    with Image.open(source) as image:
+        durations: list[int] = []
+        frames: list[Any] = []
+
+        for frame in ImageSequence.Iterator(image):
+            durations.append(frame.info.get("duration", image.info.get("duration", 100)))
+            frame = frame.convert("RGBA")
+            frame.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            frames.append(frame)
+
+        loop = image.info.get("loop", 0)
+
+    width, height = frames[0].size
+    variants: list[VariantEntry] = []
+
+    gif_path = output / f"{source.stem}.gif"
+    paletted = [frame.quantize(colors=colors, method=Image.Quantize.FASTOCTREE) for frame in frames]
+    paletted[0].save(
+        gif_path,
+        save_all=True,
+        append_images=paletted[1:],
+        duration=durations,
+        loop=loop,
+        optimize=True,
+        disposal=2,
+    )
+
+    webp_path = output / f"{source.stem}.webp"
+    frames[0].save(
+        webp_path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=loop,
+        quality=75,
+        method=6,
+    )
+
+    for path, fmt in ((gif_path, "gif"), (webp_path, "webp")):
+        encoded = path.read_bytes()
+        variants.append(
+            VariantEntry(
+                file=path.name,
+                format=fmt,
+                size=len(encoded),
+                hash=_hash_bytes(encoded),
+                width=width,
+                height=height,
+            )
+        )
+
+    return SourceEntry(hash=_hash_bytes(data), size=len(data), max_side=max_side, colors=colors, variants=variants)
+
+
+def _is_current(entry: Optional[SourceEntry], source_hash: str, output: Path, max_side: int, colors: int) -> bool:
+    if entry is None or entry["hash"] != source_hash:
+        return False
+
+    # Entries written before the parameters were recorded have neither, so they are rebuilt once
+    if entry.get("max_side") != max_side or entry.get("colors") != colors:
+        return False
+
+    return all((output / variant["file"]).exists() for variant in entry["variants"])
+
+
+def build_assets(
+    source: Path = IMAGE_DIRECTORY,
+    output: Path = BUILD_DIRECTORY,
+    *,
+    max_side: int = 320,
+    colors: int = 64,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Manifest:
+    """Re-encode every GIF whose content or build parameters changed since the last build
+
+    Parameters
+    ----------
+    source : Path, optional
+        The directory of source GIFs
+    output : Path, optional
+        Where the variants and the manifest are written
+    max_side : int, optional
+        The maximum width and height of the variants, by default 320
+    colors : int, optional
+        The palette size of the GIF variant, by default 64
+    workers : Optional[int], optional
+        The number of worker processes, by default one per CPU
+    force : bool, optional
+        Rebuild everything, even unchanged sources, by default False
+
+    Returns
+    -------
+    Manifest
+        The updated manifest
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output)
+    previous = manifest["sources"]
+
+    sources = sorted(source.glob("*.gif"))
+    pending: list[Path] = []
+    for path in sources:
+        entry = previous.get(path.name)
+        if force or not _is_current(entry, _hash_bytes(path.read_bytes()), output, max_side, colors):
+            pending.append(path)
+
+    start = time.perf_counter()
+    entries: dict[str, SourceEntry] = {path.name: previous[path.name] for path in sources if path not in pending}
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = {path: pool.submit(_encode, path, output, max_side, colors) for path in pending}
+
+            for path, future in futures.items():
+                entry = entries[path.name] = future.result()
+                sizes = ", ".join(f"{variant['format']} {variant['size'] // 1024} KiB" for variant in entry["variants"])
+                log.info(f"Built {path.name} ({entry['size'] // 1024} KiB): {sizes}")
+
+    manifest = Manifest(version=MANIFEST_VERSION, sources=dict(sorted(entries.items())))
+    (output / MANIFEST_NAME).write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+
+    source_size = sum(entry["size"] for entry in entries.values())
+    smallest = sum(min(v["size"] for v in entry["variants"]) for entry in entries.values())
+    log.info(
+        f"Built {len(pending)} of {len(sources)} assets in {time.perf_counter() - start:.1f}s, "
+        f"{source_size / 2**20:.1f} MiB -> {smallest / 2**20:.1f} MiB using the smallest variants"
+    )
+
+    return manifest
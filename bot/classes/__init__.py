@@ -1,6 +1,8 @@
+from .assets import *
 from .embed import *
 from .errors import *
 from .guild import *
 from .interaction import *
+from .leaderboard import *
 from .translator import *
 from .user import *
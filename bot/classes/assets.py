@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import random
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional, Sequence, TypedDict
+from urllib.parse import parse_qs, urlparse
+
+import discord
+import orjson
+
+if TYPE_CHECKING:
+    from ..main import Yuno
+
+
+__all__: tuple[str, ...] = ("Asset", "AssetManager", "load_manifest")
+
+log = logging.getLogger(__name__)
+
+ASSET_PATTERN = re.compile(r"^(?P<action>[a-z_]+?)_(?P<variant>\d+)$")
+IMAGE_DIRECTORY = Path(__file__).parent / "data" / "images"
+BUILD_DIRECTORY = IMAGE_DIRECTORY / "build"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# How soon a process that doesn't upload looks again for assets that had no URL yet
+READ_RETRY_INTERVAL = 60.0
+
+
+class VariantEntry(TypedDict):
+    file: str
+    format: str
+    size: int
+    hash: str
+    width: int
+    height: int
+
+
+class SourceEntry(TypedDict):
+    hash: str
+    size: int
+    max_side: int
+    colors: int
+    variants: list[VariantEntry]
+
+
+class Manifest(TypedDict):
+    """Written by ``python run.py assets build``, see ``bot/asset_builder.py``"""
+
+    version: int
+    sources: dict[str, SourceEntry]
+
+
+def load_manifest(directory: Path = BUILD_DIRECTORY) -> Manifest:
+    try:
+        manifest: Manifest = orjson.loads((directory / MANIFEST_NAME).read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return Manifest(version=MANIFEST_VERSION, sources={})
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return Manifest(version=MANIFEST_VERSION, sources={})
+
+    return manifest
+
+
+class Asset(NamedTuple):
+    action: str
+    variant: int
+    path: Path
+    """The file to send: the smallest built variant that fits, or the source GIF"""
+
+    @property
+    def file_name(self) -> str:
+        return self.path.name
+
+
+class StoredAsset(NamedTuple):
+    channel_id: int
+    message_id: int
+    url: str
+
+
+def _url_expires_at(url: str) -> Optional[datetime.datetime]:
+    """Discord signs attachment URLs with a hex ``ex`` timestamp after which they stop working"""
+    expiry = parse_qs(urlparse(url).query).get("ex")
+    if not expiry:
+        return None
+
+    return datetime.datetime.fromtimestamp(int(expiry[0], 16), tz=datetime.timezone.utc)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class AssetManager:
+    """Serves the bundled GIFs from Discord's CDN instead of re-uploading them
+
+    Every image is uploaded once to a storage channel and its CDN URL is kept
+    in the ``assets`` table, keyed by the SHA-256 of the file, so a file is only
+    uploaded again when its content changes. Discord signs attachment URLs with
+    an expiry, so URLs close to expiring are renewed by re-fetching the
+    storage message rather than uploading again.
+
+    Only the process with ``upload`` set sends anything to Discord; the others
+    read the URLs it stored, so cluster workers never race to upload the same
+    file.
+
+    Parameters
+    ----------
+    bot : Yuno
+        The bot instance
+    channel_id : Optional[int], optional
+        The storage channel to upload to. Without one, ``get_url`` always returns None
+        and callers attach the local file instead.
+    directory : Path, optional
+        The image directory, by default the bundled ``data/images``
+    sync_interval : float, optional
+        Seconds between syncs, by default 6 hours. Must stay well below the
+        lifetime of a signed URL (currently 24 hours).
+    formats : Sequence[str], optional
+        The built variant formats that may be sent, by default ("gif",)
+    max_bytes : int, optional
+        The largest file that may be sent, by default 8 MiB
+    upload : bool, optional
+        Whether this process uploads and renews assets, by default True
+    """
+
+    def __init__(
+        self,
+        bot: Yuno,
+        channel_id: Optional[int] = None,
+        directory: Path = IMAGE_DIRECTORY,
+        sync_interval: float = 6 * 60 * 60,
+        formats: Sequence[str] = ("gif",),
+        max_bytes: int = 8 * 2**20,
+        upload: bool = True,
+    ) -> None:
+        self.bot = bot
+        self.channel_id = channel_id
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.formats = formats
+        self.max_bytes = max_bytes
+        self.upload = upload
+
+        self.assets: dict[str, list[Asset]] = self._index()
+        self._urls: dict[Path, str] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def _pick_file(self, source: Path, entry: Optional[SourceEntry]) -> Path:
+        """The smallest file that fits ``max_bytes`` among the source and its built variants"""
+        source_size = source.stat().st_size
+        candidates = [(source_size, source)]
+
+        # A size mismatch means the source changed since the last build
+        if entry is not None and entry["size"] == source_size:
+            for variant in entry["variants"]:
+                path = self.directory / "build" / variant["file"]
+                if variant["format"] in self.formats and path.exists():
+                    candidates.append((variant["size"], path))
+
+        fitting = [candidate for candidate in candidates if candidate[0] <= self.max_bytes]
+        return min(fitting or candidates)[1]
+
+    def _index(self) -> dict[str, list[Asset]]:
+        assets: dict[str, list[Asset]] = {}
+        manifest = load_manifest(self.directory / "build")
+
+        for path in sorted(self.directory.glob("*.gif")):
+            if match := ASSET_PATTERN.match(path.stem):
+                file = self._pick_file(path, manifest["sources"].get(path.name))
+                asset = Asset(match["action"], int(match["variant"]), file)
+                assets.setdefault(asset.action, []).append(asset)
+
+        return assets
+
+    def get_asset(self, action: str, variant: Optional[int] = None) -> Optional[Asset]:
+        """Pick an asset for the action, at random unless a variant is given"""
+        if not (assets := self.assets.get(action)):
+            return None
+
+        if variant is None:
+            return random.choice(assets)
+
+        return next((asset for asset in assets if asset.variant == variant), None)
+
+    def get_url(self, asset: Asset) -> Optional[str]:
+        return self._urls.get(asset.path)
+
+    def get_file(self, asset: Asset) -> discord.File:
+        return discord.File(asset.path, filename=asset.file_name)
+
+    async def _get_channel(self) -> Optional[discord.abc.Messageable]:
+        if self.channel_id is None:
+            return None
+
+        channel = self.bot.get_channel(self.channel_id) or await self.bot.fetch_channel(self.channel_id)
+        if not isinstance(channel, discord.abc.Messageable):
+            log.error(f"Asset channel {self.channel_id} is not a text channel")
+            return None
+
+        return channel
+
+    async def _upload(self, channel: discord.abc.Messageable, asset: Asset, content_hash: str) -> StoredAsset:
+        message = await channel.send(content=f"{asset.file_name} `{content_hash}`", file=self.get_file(asset))
+        stored = StoredAsset(message.channel.id, message.id, message.attachments[0].url)
+
+        await self.bot.pool.execute(
+            """
+            INSERT INTO assets (content_hash, file_name, channel_id, message_id, url)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (content_hash)
+            DO UPDATE SET channel_id = $3, message_id = $4, url = $5, uploaded_at = NOW()
+            """,
+            content_hash,
+            asset.file_name,
+            *stored,
+        )
+        log.info(f"Uploaded asset {asset.file_name}")
+        return stored
+
+    async def _renew(
+        self, channel: discord.abc.Messageable, content_hash: str, stored: StoredAsset
+    ) -> Optional[StoredAsset]:
+        try:
+            message = await channel.fetch_message(stored.message_id)
+        except discord.NotFound:
+            return None
+
+        renewed = stored._replace(url=message.attachments[0].url)
+        await self.bot.pool.execute("UPDATE assets SET url = $2 WHERE content_hash = $1", content_hash, renewed.url)
+        return renewed
+
+    async def sync(self) -> int:
+        """Make sure every asset has a usable CDN URL, uploading only new or changed files
+
+        Returns the number of assets left without one, which only happens in
+        processes that don't upload.
+        """
+        if self.channel_id is None:
+            return 0
+
+        assets = [asset for variants in self.assets.values() for asset in variants]
+        hashes = await asyncio.gather(*(asyncio.to_thread(_hash_file, asset.path) for asset in assets))
+        # Anything that would expire before the next sync is renewed now
+        renew_before = discord.utils.utcnow() + datetime.timedelta(seconds=self.sync_interval, hours=1)
+
+        records = await self.bot.pool.fetch(
+            "SELECT content_hash, channel_id, message_id, url FROM assets WHERE content_hash = ANY($1::text[])",
+            hashes,
+        )
+        known = {
+            record["content_hash"]: StoredAsset(record["channel_id"], record["message_id"], record["url"])
+            for record in records
+        }
+
+        if not self.upload:
+            return self._read(assets, hashes, known)
+
+        if (channel := await self._get_channel()) is None:
+            return 0
+
+        # Uploads can take minutes on a first sync, so no connection is held across the Discord calls;
+        # each write takes one from the pool just for its statement
+        for asset, content_hash in zip(assets, hashes):
+            stored = known.get(content_hash)
+
+            if stored is not None and (expires_at := _url_expires_at(stored.url)) and expires_at < renew_before:
+                stored = await self._renew(channel, content_hash, stored)
+
+            if stored is None:
+                stored = await self._upload(channel, asset, content_hash)
+
+            self._urls[asset.path] = stored.url
+
+        log.info(f"Synced {len(self._urls)} assets")
+        return 0
+
+    def _read(self, assets: list[Asset], hashes: list[str], known: dict[str, StoredAsset]) -> int:
+        now = discord.utils.utcnow()
+        missing = 0
+
+        for asset, content_hash in zip(assets, hashes):
+            stored = known.get(content_hash)
+            if stored is None or ((expires_at := _url_expires_at(stored.url)) and expires_at < now):
+                # Not uploaded or renewed yet, so the file is attached until it is
+                self._urls.pop(asset.path, None)
+                missing += 1
+            else:
+                self._urls[asset.path] = stored.url
+
+        log.info(f"Read {len(self._urls)} asset URLs, {missing} not uploaded yet")
+        return missing
+
+    async def _sync_loop(self) -> None:
+        while True:
+            missing = 0
+            try:
+                missing = await self.sync()
+            except Exception as e:
+                log.error(f"Failed to sync assets: {e!r}")
+
+            # The uploading process may still be working through a first sync
+            await asyncio.sleep(min(self.sync_interval, READ_RETRY_INTERVAL) if missing else self.sync_interval)
+
+    def start(self) -> None:
+        """Sync now and then periodically, so URLs are renewed before they expire"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 from enum import Enum
 from typing import (TYPE_CHECKING, NamedTuple, Optional, Protocol, Type,
@@ -8,8 +7,6 @@ from typing import (TYPE_CHECKING, NamedTuple, Optional, Protocol, Type,
 
 from discord.ext import commands
 
-from ..utils import MessagePreview
-
 if TYPE_CHECKING:
     from discord import Guild, User
     from discord.ext.commands import Context
@@ -96,8 +93,9 @@ class YunoCommandError(commands.CommandError, YunoError):
         return palette[self.level]
 
     async def send_timed_response(self, ctx: Context[Yuno], message: str, time: int = 5) -> None:
-        async with MessagePreview(ctx, message) as _:
-            return await asyncio.sleep(time)
+        # The deletion is left to the bot's scheduler so nothing waits on it here
+        response = await ctx.reply(content=message)
+        ctx.bot.message_scheduler.schedule(response, time)
 
     def log_case(self, message: str) -> None:
         log.error(message)
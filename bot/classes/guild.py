@@ -5,6 +5,8 @@ from typing import TYPE_CHECKING, List, Optional, Sequence
 import asyncpg
 import discord
 
+from ..utils import queries
+
 if TYPE_CHECKING:
     from datetime import datetime
 
@@ -54,10 +56,16 @@ class YGuild:
 
     @staticmethod
     async def get_guild(db: asyncpg.Connection, guild_id: int) -> Optional[YGuild]:
-        record = await db.fetchrow("SELECT * FROM guilds WHERE guild_id = $1", guild_id)
+        record = await queries.fetchrow(db, queries.GET_GUILD, guild_id)
 
         return YGuild(record) if record else None
 
+    @staticmethod
+    async def get_many(db: asyncpg.Connection, guild_ids: Sequence[int]) -> List[YGuild]:
+        records = await queries.fetch(db, queries.GET_GUILDS, guild_ids)
+
+        return [YGuild(record) for record in records]
+
     @staticmethod
     async def get_all_guilds(db: asyncpg.Connection) -> List[YGuild]:
         records = await db.fetch("SELECT * FROM guilds")
@@ -66,6 +74,6 @@ class YGuild:
 
     @staticmethod
     async def get_locale(db: asyncpg.Connection, guild_id: int) -> str:
-        record = await db.fetchval("SELECT locale FROM guilds WHERE guild_id = $1", guild_id)
+        record = await queries.fetchval(db, queries.GET_GUILD_LOCALE, guild_id)
 
         return record or "en_US"
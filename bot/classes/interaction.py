@@ -10,20 +10,101 @@ import discord
 import orjson
 
 from ..config import Config
+from ..utils import queries
 from .embed import YEmbed
 
 if TYPE_CHECKING:
     from discord.ext.commands import Context
 
     from ..main import Yuno
+    from .translator import Template, TranslationIndex, Translator
 
 
 conf = Config()
 
-__all__: tuple[str, ...] = ("UserInteractions",)
+__all__: tuple[str, ...] = ("UserInteractions", "ActionEmbedTemplate")
+
+
+class ActionEmbedTemplate:
+    """The static parts of an interaction embed for one command and locale
+
+    Rendering only picks a description and fills in the names and the count.
+
+    Parameters
+    ----------
+    descriptions : tuple[Template, ...]
+        The descriptions to pick from
+    footer : Template
+        The footer, formatted with ``author``, ``target`` and ``count``
+    emoji : Optional[str], optional
+        Prepended to the description, by default None
+    colour : int, optional
+        The embed colour, by default the configured default colour
+    """
+
+    __slots__ = ("descriptions", "footer", "emoji", "colour")
+
+    def __init__(
+        self,
+        descriptions: tuple[Template, ...],
+        footer: Template,
+        emoji: Optional[str] = None,
+        colour: int = conf.DEFAULT_COLOR,
+    ) -> None:
+        self.descriptions = tuple(
+            (f"{emoji} {template.source}" if emoji else template.source).format for template in descriptions
+        )
+        self.footer = footer.format
+        self.emoji = emoji
+        self.colour = colour
+
+    @classmethod
+    def from_translator(cls, translator: Translator, command: str, locale: str) -> ActionEmbedTemplate:
+        try:
+            emoji: Optional[str] = translator.get_translation(f"commands.{command}.emoji", locale)  # type: ignore
+        except KeyError:
+            emoji = None
+
+        return cls(
+            translator.get_templates(f"commands.{command}.description", locale),
+            translator.get_template(f"commands.{command}.footer", locale),
+            emoji,
+        )
+
+    def render(self, author: str, target: str, count: int, gif: Optional[str] = None) -> YEmbed:
+        embed = YEmbed(
+            colour=self.colour,
+            description=random.choice(self.descriptions)(author=author, target=target),
+        )
+        embed.set_footer(text=self.footer(author=author, target=target, count=count))
+
+        if gif is not None:
+            embed.set_image(url=gif)
+
+        return embed
 
 
 class UserInteractions:
+    def __init__(self, translator: Optional[Translator] = None) -> None:
+        self.translator = translator
+        self._templates: dict[tuple[str, str], ActionEmbedTemplate] = {}
+        self._templates_source: Optional[TranslationIndex] = None
+
+    def get_template(self, command: str, locale: str) -> ActionEmbedTemplate:
+        """Get the cached embed template, rebuilding the cache after a translation reload"""
+        if self.translator is None:
+            raise ValueError("UserInteractions was created without a translator.")
+
+        if self._templates_source is not self.translator.index:
+            self._templates = {}
+            self._templates_source = self.translator.index
+
+        key = (command, locale)
+        if (template := self._templates.get(key)) is None:
+            template = self._templates[key] = ActionEmbedTemplate.from_translator(self.translator, command, locale)
+
+        return template
+
     async def get_embed(
         self,
         ctx: Context[Yuno],
@@ -33,12 +114,13 @@ class UserInteractions:
         footer: str,
         description: str,
         emoji: Optional[str] = None,
+        gif: Optional[str] = None,
     ) -> YEmbed:
-        embed = YEmbed.default(
-            ctx,
-            description=(
-                f"{emoji}" if emoji else "" + description.format(author=author.display_name, target=target.display_name)
-            ),
+        description = description.format(author=author.display_name, target=target.display_name)
+
+        embed = YEmbed.action_command(
+            gif=gif,
+            description=f"{emoji} {description}" if emoji else description,
             footer=footer.format(
                 author=author.display_name,
                 target=target.display_name,
@@ -48,22 +130,23 @@ class UserInteractions:
 
         return embed
 
+    async def record_action(
+        self, db: asyncpg.Pool | asyncpg.Connection, author_id: int, target_id: int, action: str, delta: int = 1
+    ) -> int:
+        """Create both users if needed, count the action and return the new count, in one round-trip"""
+        return await queries.fetchval(db, queries.RECORD_ACTION, author_id, target_id, action, delta)
+
     async def insert_action(self, db: asyncpg.Pool, author_id: int, target_id: int, action: str) -> None:
-        await db.execute("SELECT insert_action_item($1, $2, $3)", author_id, target_id, action)
+        await db.execute("SELECT insert_action($1, $2, $3)", author_id, action, target_id)
 
     async def get_actions(self, db: asyncpg.Pool, author_id: int, target_id: int) -> list[str]:
         return await db.fetch(
-            "SELECT action_type FROM action WHERE user_id = $1 AND target_id = $2 ORDER BY action_count DESC",
+            "SELECT action_type FROM actions WHERE user_id = $1 AND target_id = $2 ORDER BY action_count DESC",
             author_id,
             target_id,
         )
 
     async def get_action_count(self, db: asyncpg.Pool, author_id: int, target_id: int, action: str) -> int:
-        record = await db.fetchval(
-            "SELECT action_count FROM action WHERE user_id = $1 AND target_id = $2 AND action_type = $3",
-            author_id,
-            target_id,
-            action,
-        )
+        record = await queries.fetchval(db, queries.GET_ACTION_COUNT, author_id, target_id, action)
 
         return record or 0
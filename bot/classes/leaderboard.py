@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from ..utils import SingleFlightLoader
+
+if TYPE_CHECKING:
+    from ..utils import DatabaseRouter
+
+
+__all__: tuple[str, ...] = ("TopK", "Leaderboard")
+
+log = logging.getLogger(__name__)
+
+BoardKey = tuple[int, str]
+"""(guild_id, action_type)"""
+
+
+class TopK:
+    """The K highest scores, kept sorted
+
+    Scores only ever grow, so a user that falls out of the top K can only come
+    back through ``update``, which keeps the structure exact without storing
+    everybody else.
+
+    Parameters
+    ----------
+    k : int
+        The number of entries to keep
+    """
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self._entries: list[tuple[int, int]] = []  # (-score, user_id), ascending
+        self._scores: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for neg_score, user_id in self._entries:
+            yield user_id, -neg_score
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
+
+    def update(self, user_id: int, score: int) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (-old, user_id))]
+
+        entry = (-score, user_id)
+        if len(self._entries) >= self.k and entry >= self._entries[-1]:
+            return
+
+        insort(self._entries, entry)
+        self._scores[user_id] = score
+
+        if len(self._entries) > self.k:
+            _, dropped = self._entries.pop()
+            del self._scores[dropped]
+
+    def score(self, user_id: int) -> int:
+        return self._scores[user_id]
+
+    def page(self, page: int, per_page: int = 10) -> list[tuple[int, int, int]]:
+        """Get one page of ``(rank, user_id, score)`` tuples, starting at page 1"""
+        start = max(page - 1, 0) * per_page
+        return [
+            (rank, user_id, -neg_score)
+            for rank, (neg_score, user_id) in enumerate(self._entries[start : start + per_page], start + 1)
+        ]
+
+
+class Leaderboard:
+    """Per guild leaderboards for every action type
+
+    ``actions`` doesn't know where an interaction happened, so ``record`` also
+    counts it in ``guild_actions``, buffered and written every
+    ``flush_interval`` seconds. Each (guild, action type) pair gets a ``TopK``
+    loaded with the top ``size`` rows of that table and updated in place as
+    interactions are recorded, so showing a leaderboard page never aggregates
+    anything.
+
+    A board only knows the scores of the users on it. Once it is full, a user
+    climbing onto it from below shows up when the boards are reloaded, every
+    ``refresh_interval`` seconds, which also brings in the interactions other
+    processes recorded.
+
+    Parameters
+    ----------
+    db : DatabaseRouter
+        The boards are read from the primary, where the counts are written
+    size : int, optional
+        The number of ranked users per leaderboard, by default 100
+    refresh_interval : float, optional
+        Seconds between reloads of the boards, by default 300
+    flush_interval : float, optional
+        Seconds between writes of the buffered per guild counts, by default 10
+    """
+
+    def __init__(
+        self,
+        db: DatabaseRouter,
+        *,
+        size: int = 100,
+        refresh_interval: float = 300.0,
+        flush_interval: float = 10.0,
+    ) -> None:
+        self.db = db
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.flush_interval = flush_interval
+
+        self._pending: dict[BoardKey, dict[int, int]] = {}
+        self._boards: dict[BoardKey, TopK] = {}
+        self._loader: SingleFlightLoader[BoardKey, list[tuple[int, int]]] = SingleFlightLoader(self._load_top)
+        self._flush_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def _load_top(self, keys: list[BoardKey]) -> dict[BoardKey, list[tuple[int, int]]]:
+        guild_ids, action_types = zip(*keys)
+
+        # From the primary, so a board includes every flush that came before it
+        async with self.db.write().acquire() as conn:
+            records = await conn.fetch(
+                """
+                SELECT board.guild_id, board.action_type, top.user_id, top.action_count
+                FROM unnest($1::bigint[], $2::text[]) AS board (guild_id, action_type)
+                CROSS JOIN LATERAL (
+                    SELECT user_id, action_count FROM guild_actions
+                    WHERE guild_id = board.guild_id AND action_type = board.action_type
+                    ORDER BY action_count DESC
+                    LIMIT $3
+                ) AS top
+                """,
+                guild_ids,
+                action_types,
+                self.size,
+            )
+
+        top: dict[BoardKey, list[tuple[int, int]]] = {key: [] for key in keys}
+        for record in records:
+            top[(record["guild_id"], record["action_type"])].append((record["user_id"], record["action_count"]))
+
+        return top
+
+    async def get_board(self, guild_id: int, action_type: str) -> TopK:
+        key = (guild_id, action_type)
+
+        if (board := self._boards.get(key)) is None:
+            board = TopK(self.size)
+            for user_id, total in await self._loader.load(key) or ():
+                board.update(user_id, total)
+
+            if (current := self._boards.get(key)) is not None:
+                return current
+
+            # Counts recorded here but not flushed yet aren't in guild_actions
+            for user_id, delta in self._pending.get(key, {}).items():
+                self._add(board, user_id, delta)
+            self._boards[key] = board
+
+        return board
+
+    @staticmethod
+    def _add(board: TopK, user_id: int, delta: int) -> None:
+        if user_id in board:
+            board.update(user_id, board.score(user_id) + delta)
+        elif len(board) < board.k:
+            # Everybody with a score was loaded onto a board that isn't full, so this user had none
+            board.update(user_id, delta)
+
+    def record(self, guild_id: int, user_id: int, action_type: str, delta: int = 1) -> None:
+        """Count an interaction towards the guild's leaderboard
+
+        Boards that aren't loaded yet are left alone: they will include the
+        interaction once they are.
+        """
+        key = (guild_id, action_type)
+        pending = self._pending.setdefault(key, {})
+        pending[user_id] = pending.get(user_id, 0) + delta
+
+        if (board := self._boards.get(key)) is not None:
+            self._add(board, user_id, delta)
+
+    async def flush(self) -> int:
+        """Write the buffered per guild counts and return how many rows were written"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            # Sorted, so concurrent flushes from other processes lock rows in the same order
+            rows = sorted(
+                (guild_id, action_type, user_id, delta)
+                for (guild_id, action_type), deltas in batch.items()
+                for user_id, delta in deltas.items()
+            )
+
+            try:
+                async with self.db.write().acquire() as conn:
+                    await conn.execute(
+                        """
+                        INSERT INTO guild_actions (guild_id, action_type, user_id, action_count)
+                        SELECT * FROM unnest($1::bigint[], $2::text[], $3::bigint[], $4::bigint[])
+                        ON CONFLICT (guild_id, action_type, user_id)
+                        DO UPDATE SET action_count = guild_actions.action_count + excluded.action_count
+                        """,
+                        *zip(*rows),
+                    )
+            except Exception:
+                for key, deltas in batch.items():
+                    pending = self._pending.setdefault(key, {})
+                    for user_id, delta in deltas.items():
+                        pending[user_id] = pending.get(user_id, 0) + delta
+                raise
+
+            return len(rows)
+
+    async def refresh(self) -> None:
+        """Write the buffered counts, then drop every cached leaderboard so they're reloaded"""
+        await self.flush()
+        self._boards.clear()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"Failed to flush leaderboard counts, retrying in {self.flush_interval}s: {e!r}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.error(f"Failed to refresh the leaderboards: {e!r}")
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._flush_loop()), asyncio.create_task(self._refresh_loop())]
+
+    async def close(self) -> None:
+        """Stop the background tasks and write whatever is left"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+        await self.flush()
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
 from pathlib import Path
-from typing import Any, Optional, TypedDict, TypeVar
+from string import Formatter
+from typing import Any, Callable, Final, Mapping, Optional, Sequence, TypedDict, TypeVar, Union
 
 import aiofiles
 import orjson
 
-__all__: tuple[str, ...] = ("Translator",)
+__all__: tuple[str, ...] = ("Translator", "TranslationIndex", "Template")
 
 
 T = TypeVar("T")
 
+log = logging.getLogger(__name__)
+
+_MISSING: Final = object()
+
 
 class HelpSection(TypedDict):
     description: str
@@ -70,48 +77,281 @@ class Translations(TypedDict):
     en_US: LocaleTranslations
 
 
+class Template:
+    """A translation string, parsed once at load time
+
+    The placeholders are extracted up front for validation. Formatting stays on
+    ``str.format``: its C parser beats re-joining pre-split parts in Python.
+
+    Parameters
+    ----------
+    source : str
+        The raw translation string
+    """
+
+    __slots__ = ("source", "fields", "format")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.fields: frozenset[str] = frozenset(field for _, field, _, _ in Formatter().parse(source) if field is not None)
+        self.format: Callable[..., str] = source.format
+
+    def __str__(self) -> str:
+        return self.source
+
+    def __repr__(self) -> str:
+        return f"<Template source={self.source!r}>"
+
+
+IndexEntry = Union[Template, tuple[Template, ...], None]
+"""A string, a list of strings or (None) a nested section"""
+
+
+class TranslationIndex:
+    """An immutable, flattened view of the translation file
+
+    Every node is stored under ``(locale, dotted_key)``, so a lookup is a
+    single dictionary probe per locale in the fallback chain.
+
+    Parameters
+    ----------
+    translations : Translations
+        The parsed translation file
+    default_locale : str, optional
+        The locale every other locale falls back to, by default "en_US"
+    fallbacks : Optional[Mapping[str, Sequence[str]]], optional
+        Extra locales to try before the default one, e.g. ``{"de_AT": ["de_DE"]}``
+    """
+
+    def __init__(
+        self,
+        translations: Translations,
+        default_locale: str = "en_US",
+        fallbacks: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> None:
+        if default_locale not in translations:
+            raise ValueError(f"Default locale '{default_locale}' missing from the translation file.")
+
+        self.translations = translations
+        self.default_locale = default_locale
+        self.locales: frozenset[str] = frozenset(translations)
+        self.entries: dict[tuple[str, str], IndexEntry] = {}
+
+        for locale, tree in translations.items():
+            self._flatten(locale, "", tree)
+
+        fallbacks = fallbacks or {}
+        self.chains: dict[str, tuple[str, ...]] = {}
+        for locale in self.locales:
+            chain = [locale, *fallbacks.get(locale, ()), default_locale]
+            self.chains[locale] = tuple(dict.fromkeys(loc for loc in chain if loc in self.locales))
+
+        self.errors, self.warnings = self._validate()
+
+    def _flatten(self, locale: str, prefix: str, node: Any) -> None:
+        if isinstance(node, str):
+            self.entries[(locale, prefix)] = Template(node)
+        elif isinstance(node, list):
+            self.entries[(locale, prefix)] = tuple(Template(str(item)) for item in node)
+        elif isinstance(node, dict):
+            if prefix:
+                self.entries[(locale, prefix)] = None
+            for key, value in node.items():
+                self._flatten(locale, f"{prefix}.{key}" if prefix else key, value)
+
+    def keys(self, locale: str) -> dict[str, frozenset[str]]:
+        """The leaf keys of a locale, mapped to their placeholders"""
+        keys: dict[str, frozenset[str]] = {}
+        for (loc, key), entry in self.entries.items():
+            if loc != locale or entry is None:
+                continue
+            if isinstance(entry, Template):
+                keys[key] = entry.fields
+            else:
+                keys[key] = frozenset().union(*(template.fields for template in entry))
+        return keys
+
+    @property
+    def problems(self) -> list[str]:
+        return self.errors + self.warnings
+
+    def _validate(self) -> tuple[list[str], list[str]]:
+        """Compare every locale with the default one
+
+        Returns
+        -------
+        tuple[list[str], list[str]]
+            Errors (placeholder mismatches, which break formatting) and
+            warnings (missing or unknown keys, covered by the fallback chain)
+        """
+        errors: list[str] = []
+        warnings: list[str] = []
+        reference = self.keys(self.default_locale)
+
+        for locale in sorted(self.locales - {self.default_locale}):
+            keys = self.keys(locale)
+
+            for key in sorted(reference.keys() - keys.keys()):
+                warnings.append(f"{locale}: missing key '{key}'")
+            for key in sorted(keys.keys() - reference.keys()):
+                warnings.append(f"{locale}: unknown key '{key}'")
+            for key in sorted(reference.keys() & keys.keys()):
+                if keys[key] != reference[key]:
+                    errors.append(
+                        f"{locale}: placeholders of '{key}' are {sorted(keys[key])}, expected {sorted(reference[key])}"
+                    )
+
+        return errors, warnings
+
+    def lookup(self, key: str, locale: str) -> IndexEntry:
+        entry = self.entries.get((locale, key), _MISSING)
+        if entry is not _MISSING:
+            return entry  # type: ignore
+
+        chain = self.chains.get(locale)
+        if chain is None:
+            raise ValueError(f"Locale '{locale}' not supported.")
+
+        for loc in chain[1:]:
+            entry = self.entries.get((loc, key), _MISSING)
+            if entry is not _MISSING:
+                return entry  # type: ignore
+
+        raise KeyError(f"Key '{key}' not found in translation file.")
+
+
 class Translator:
-    def __init__(self, path: Optional[str | Path] = None) -> None:
-        self._file_path = path or Path(r"bot\classes\data\translation.json")
-        self.translations: Optional[Translations] = None
+    def __init__(
+        self,
+        path: Optional[str | Path] = None,
+        *,
+        default_locale: str = "en_US",
+        fallbacks: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> None:
+        self._file_path = path or Path(__file__).parent / "data" / "translation.json"
+        self.default_locale = default_locale
+        self.fallbacks = fallbacks
+        self._index: Optional[TranslationIndex] = None
+        self._mtime_ns: Optional[int] = None
+        self._watcher: Optional[asyncio.Task[None]] = None
+
+    @property
+    def translations(self) -> Optional[Translations]:
+        return self._index.translations if self._index is not None else None
+
+    @property
+    def index(self) -> TranslationIndex:
+        if self._index is None:
+            raise ValueError("Translations not loaded. Call 'load_translations' first.")
 
-    async def load_translations(self) -> None:
+        return self._index
+
+    def _build_index(self, content: bytes) -> TranslationIndex:
+        try:
+            translations = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Error decoding JSON from file: {self._file_path}") from e
+
+        return TranslationIndex(translations, self.default_locale, self.fallbacks)
+
+    async def _read(self) -> tuple[bytes, int]:
         try:
             async with aiofiles.open(self._file_path, mode="rb") as f:
-                content = await f.read()
-                self.translations = orjson.loads(content)
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                return await f.read(), mtime_ns
         except FileNotFoundError as e:
             raise FileNotFoundError(f"Translation file not found: {self._file_path}") from e
-        except orjson.JSONDecodeError as e:
-            raise ValueError(f"Error decoding JSON from file: {self._file_path}") from e
 
-    def get_translation(self, key: str, locale: str = "en_US") -> str | dict[str, str]:
-        if self.translations is None:
-            raise ValueError("Translations not loaded. Call 'load_translations' first.")
+    async def load_translations(self) -> None:
+        content, mtime_ns = await self._read()
+        index = await asyncio.to_thread(self._build_index, content)
 
-        if locale not in self.translations:
-            raise ValueError(f"Locale '{locale}' not supported.")
+        for problem in index.problems:
+            log.warning(f"Translation file {self._file_path}: {problem}")
 
-        keys = key.split(".")
-        translation = self.translations[locale]
-        current_node = translation
+        self._index = index
+        self._mtime_ns = mtime_ns
 
-        for key in keys:
-            if key not in current_node:
-                raise KeyError(f"Key '{key}' not found in translation file.")
+    def get_template(self, key: str, locale: str = "en_US") -> Template:
+        if self._index is None:
+            raise ValueError("Translations not loaded. Call 'load_translations' first.")
 
-            current_node = current_node[key]
+        entry = self._index.lookup(key, locale)
 
-        if not isinstance(current_node, str):
+        if not isinstance(entry, Template):
             raise ValueError("Key does not point to a string value.")
 
-        return current_node
+        return entry
+
+    def get_templates(self, key: str, locale: str = "en_US") -> tuple[Template, ...]:
+        entry = self.index.lookup(key, locale)
+
+        if not isinstance(entry, tuple):
+            raise ValueError("Key does not point to a list of strings.")
 
-    async def reload_translations(self) -> None:
-        await self.load_translations()
+        return entry
+
+    def get_translation(self, key: str, locale: str = "en_US") -> str | dict[str, str]:
+        return self.get_template(key, locale).source
+
+    def format(self, key: str, locale: str = "en_US", **kwargs: Any) -> str:
+        return self.get_template(key, locale).format(**kwargs)
+
+    async def reload_translations(self) -> bool:
+        """Reload the translation file, keeping the current one if the new one is broken
+
+        Parsing and validation run in a worker thread and the new index replaces
+        the old one in a single assignment, so lookups never see a partial state.
+
+        Returns
+        -------
+        bool
+            Whether the new translations were swapped in
+        """
+        try:
+            content, self._mtime_ns = await self._read()
+            index = await asyncio.to_thread(self._build_index, content)
+        except (OSError, ValueError) as e:
+            # The recorded mtime keeps the watcher from retrying the same broken file
+            log.error(f"Not reloading translations: {e}")
+            return False
+
+        if index.errors:
+            for error in index.errors:
+                log.error(f"Not reloading translations from {self._file_path}: {error}")
+            return False
+
+        for warning in index.warnings:
+            log.warning(f"Translation file {self._file_path}: {warning}")
+
+        self._index = index
+        log.info(f"Reloaded translations from {self._file_path}")
+        return True
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                mtime_ns = os.stat(self._file_path).st_mtime_ns
+            except OSError:
+                continue
+
+            if mtime_ns != self._mtime_ns:
+                await self.reload_translations()
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the translation file's mtime and reload it when it changes"""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch(interval))
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
 
     def is_valid_locale(self, locale: str) -> bool:
-        return self.translations is not None and locale in self.translations
+        return self._index is not None and locale in self._index.locales
 
 
 async def main() -> None:
@@ -119,7 +359,7 @@ async def main() -> None:
     await translator.load_translations()
 
     reset_success = translator.get_translation(
-        key="user_commands.time.message",
+        key="commands.time.message",
         locale="en_US",
     )
 
@@ -9,7 +9,7 @@ from discord.audit_logs import F
 from discord.ext import commands
 from discord.ext.commands import Converter
 
-from ..utils import FakeRecord
+from ..utils import FakeRecord, queries
 from .embed import YEmbed
 
 if TYPE_CHECKING:
@@ -67,15 +67,20 @@ class YUser:
 
     @staticmethod
     async def get_user(db: asyncpg.Connection, user_id: int) -> Optional[YUser]:
-        record = await db.fetchrow(
-            """
-            SELECT * FROM users
-            WHERE user_id = $1
-            """,
-            user_id,
-        )
+        record = await queries.fetchrow(db, queries.GET_USER, user_id)
         return YUser(record) if record else None
 
+    @staticmethod
+    async def get_many(db: asyncpg.Connection, user_ids: Sequence[int]) -> list[YUser]:
+        records = await queries.fetch(db, queries.GET_USERS, user_ids)
+        return [YUser(record) for record in records]
+
+    @staticmethod
+    async def ensure_many(db: asyncpg.Connection, user_ids: Sequence[int]) -> list[YUser]:
+        """Fetch the users, inserting default rows for the ones that don't exist yet"""
+        records = await queries.fetch(db, queries.ENSURE_USERS, user_ids)
+        return [YUser(record) for record in records]
+
     @staticmethod
     def settings_embed(ctx: Context, user: YUser) -> YEmbed:
         return YEmbed.default(
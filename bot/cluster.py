@@ -0,0 +1,218 @@
+"""Run Yuno as several processes, each owning a slice of the shards
+
+Start with ``python run.py cluster --workers N``. The supervisor asks Discord
+for the recommended shard count, runs the migrations once, and then starts one
+worker process per slice of shards. Every worker is a normal ``Yuno``
+``AutoShardedBot`` with its own connection pool. Crashed workers are restarted
+with an exponential backoff, which resets once a worker has stayed up for a while.
+A worker that exits with code 0 shut down on purpose and stays down; the
+supervisor stops once none are left.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import multiprocessing.connection
+import signal
+import time
+from multiprocessing.process import BaseProcess
+from typing import Any, NamedTuple, Optional
+
+import aiohttp
+
+__all__: tuple[str, ...] = ("GatewayInfo", "ClusterSupervisor", "get_gateway_info", "split_shards")
+
+log = logging.getLogger(__name__)
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+# Discord allows max_concurrency identifies per 5 seconds
+IDENTIFY_INTERVAL = 5.0
+
+
+class GatewayInfo(NamedTuple):
+    shards: int
+    max_concurrency: int
+
+
+async def get_gateway_info(token: str) -> GatewayInfo:
+    """Fetch the recommended shard count and identify concurrency from ``/gateway/bot``"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+
+    return GatewayInfo(data["shards"], data["session_start_limit"]["max_concurrency"])
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Split the shard ids into at most ``workers`` contiguous, evenly sized slices"""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+
+    slices: list[list[int]] = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (i < extra)
+        slices.append(list(range(start, end)))
+        start = end
+
+    return slices
+
+
+def _run_worker(cluster_id: int, cluster_count: int, shard_ids: list[int], shard_count: int) -> None:
+    from .main import main
+
+    # Ctrl+C reaches the whole process group; the supervisor decides what happens next
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    main(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id, cluster_count=cluster_count, migrations=False)
+
+
+class _Worker:
+    def __init__(self, cluster_id: int, shard_ids: list[int]) -> None:
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process: Optional[BaseProcess] = None
+        self.started_at: float = 0.0
+        self.failures: int = 0
+        self.restart_at: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return f"<Worker cluster_id={self.cluster_id} shards={self.shard_ids[0]}-{self.shard_ids[-1]}>"
+
+
+class ClusterSupervisor:
+    """Starts the worker processes and restarts the ones that crash
+
+    Parameters
+    ----------
+    token : str
+        The bot token, used to fetch the recommended shard count
+    dsn : str
+        The database DSN, used to run the migrations once before the workers start
+    workers : int
+        The number of worker processes
+    shard_count : Optional[int], optional
+        The total number of shards, by default the count Discord recommends
+    max_restart_delay : float, optional
+        The longest a crashed worker waits before it's restarted, by default 60 seconds
+    stable_after : float, optional
+        Seconds a worker must stay up for its backoff to reset, by default 5 minutes
+    """
+
+    def __init__(
+        self,
+        token: str,
+        dsn: str,
+        workers: int,
+        *,
+        shard_count: Optional[int] = None,
+        max_restart_delay: float = 60.0,
+        stable_after: float = 300.0,
+    ) -> None:
+        self.token = token
+        self.dsn = dsn
+        self.worker_count = workers
+        self.shard_count = shard_count
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+
+        self.workers: list[_Worker] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = False
+
+    async def _prepare(self) -> GatewayInfo:
+        from .main import Yuno
+
+        info = await get_gateway_info(self.token)
+        pool = await Yuno.setup_db(self.dsn, migrations=True)
+        await pool.close()
+
+        return info
+
+    def _start(self, worker: _Worker, shard_count: int) -> None:
+        worker.process = self._context.Process(
+            target=_run_worker,
+            args=(worker.cluster_id, len(self.workers), worker.shard_ids, shard_count),
+            name=f"yuno-cluster-{worker.cluster_id}",
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        log.info(f"Started cluster {worker.cluster_id} (pid {worker.process.pid}) with shards {worker.shard_ids}")
+
+    def _on_exit(self, worker: _Worker) -> None:
+        assert worker.process is not None
+        worker.process.join()
+        exitcode = worker.process.exitcode
+        uptime = time.monotonic() - worker.started_at
+        worker.process.close()
+        worker.process = None
+
+        if exitcode == 0:
+            log.info(f"Cluster {worker.cluster_id} shut down after {uptime:.0f}s, not restarting it")
+            return
+
+        if uptime >= self.stable_after:
+            worker.failures = 0
+        worker.failures += 1
+
+        delay = min(self.max_restart_delay, 2 ** (worker.failures - 1))
+        worker.restart_at = time.monotonic() + delay
+        log.error(f"Cluster {worker.cluster_id} exited with code {exitcode} after {uptime:.0f}s, restarting in {delay}s")
+
+    def stop(self, *_: Any) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        """Start every worker and supervise them until SIGINT or SIGTERM"""
+        info = asyncio.run(self._prepare())
+        shard_count = self.shard_count or info.shards
+        slices = split_shards(shard_count, self.worker_count)
+        self.workers = [_Worker(cluster_id, shard_ids) for cluster_id, shard_ids in enumerate(slices)]
+        log.info(f"Running {shard_count} shards across {len(self.workers)} processes")
+
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        # Each process identifies its own shards; stagger them so they don't share an identify window
+        for worker in self.workers:
+            if self._stopping:
+                break
+
+            self._start(worker, shard_count)
+            time.sleep(math.ceil(len(worker.shard_ids) / info.max_concurrency) * IDENTIFY_INTERVAL)
+
+        while not self._stopping:
+            running = {worker.process.sentinel: worker for worker in self.workers if worker.process is not None}
+            for sentinel in multiprocessing.connection.wait(list(running), timeout=1.0):
+                self._on_exit(running[sentinel])  # type: ignore
+
+            if all(worker.process is None and worker.restart_at is None for worker in self.workers):
+                log.info("Every cluster shut down, stopping")
+                break
+
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.restart_at is not None and worker.restart_at <= now and not self._stopping:
+                    self._start(worker, shard_count)
+
+        self.shutdown()
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Ask every worker to close and wait for them, killing the ones that hang"""
+        processes = [worker.process for worker in self.workers if worker.process is not None]
+        for process in processes:
+            process.terminate()
+
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                log.warning(f"{process.name} did not exit in time, killing it")
+                process.kill()
+                process.join()
+
+        log.info("All clusters stopped")
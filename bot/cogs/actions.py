@@ -11,8 +11,8 @@ import asyncpg
 import discord
 from discord.ext import commands, tasks
 
-from ..classes import FuzzyMember, UserInteractions, YEmbed, YUser
-from ..utils import module_ruleset
+from ..classes import FuzzyMember, UserInteractions, YEmbed, YUser, YunoCommandError
+from ..utils import RateLimitScope, module_ruleset, ratelimit, tracing
 
 if TYPE_CHECKING:
     from discord.ext.commands import Context
@@ -30,30 +30,37 @@ __all__: tuple[str, ...] = ("UserInteractionModule",)
 
 class Interaction:
     int_type: str
+    guild_id: int
     author: YUser
     target: YUser
 
+    def __init__(self, int_type: str, guild_id: int, author: YUser, target: YUser) -> None:
+        self.int_type = int_type
+        self.guild_id = guild_id
+        self.author = author
+        self.target = target
+
 
 @module_ruleset(commands.guild_only())
-@module_ruleset(commands.cooldown(rate=1, per=5, type=commands.BucketType.user))
+@module_ruleset(ratelimit(rate=1, per=5, scope=RateLimitScope.USER))
 class UserInteractionModule(commands.Cog, name="User Interactions"):
     def __init__(self, bot: Yuno) -> None:
         self.bot = bot
-        self.interactions = UserInteractions()
+        self.interactions = UserInteractions(bot.translator)
 
     async def cog_check(self, ctx: Context[Yuno]) -> bool:  # type: ignore (idk man)
         if ctx.guild is None:
             raise commands.NoPrivateMessage(".-.")
 
-        bot = cast(Yuno, ctx.bot)
+        bot = cast("Yuno", ctx.bot)
 
         if ctx.author.id not in bot.OWNER_IDS:
             return True
 
-        if ctx.author.id not in await bot.user_cache.get_users():
-            async with bot.pool.acquire() as conn:
-                user = await bot.user_cache.fetch_user(conn, ctx.author.id)
-                await bot.user_cache.set_user(user)
+        if ctx.author.id not in bot.user_cache:
+            with tracing.span("cog_check"):
+                async with bot.pool.acquire() as conn:
+                    await bot.user_cache.fetch_user(conn, ctx.author.id)
 
         return True
 
@@ -66,35 +73,40 @@ class UserInteractionModule(commands.Cog, name="User Interactions"):
                 interaction.target.user_id,
             )
 
-    async def insert_action(self, interaction: Interaction) -> None:
-        await self.ensure_relationship(interaction)
+    async def insert_action(self, interaction: Interaction) -> int:
+        self.bot.leaderboard.record(interaction.guild_id, interaction.author.user_id, interaction.int_type)
 
-        async with self.bot.pool.acquire() as conn:
-            await conn.execute(
-                "SELECT insert_action($1, $2, $3)",
+        if self.bot.action_counter is None:
+            return await self.interactions.record_action(
+                self.bot.pool,
                 interaction.author.user_id,
-                interaction.int_type,
                 interaction.target.user_id,
+                interaction.int_type,
             )
 
+        return await self.bot.action_counter.increment(
+            interaction.author.user_id,
+            interaction.target.user_id,
+            interaction.int_type,
+        )
+
     async def get_count(self, interaction: Interaction) -> int:
-        async with self.bot.pool.acquire() as conn:
-            record = await conn.fetchval(
-                """
-                SELECT action_count FROM actions
-                WHERE user_id = $1 
-                AND target_id = $2
-                AND action_type = $3
-                """,
+        if self.bot.action_counter is None:
+            return await self.interactions.get_action_count(
+                self.bot.db.read(),
                 interaction.author.user_id,
                 interaction.target.user_id,
                 interaction.int_type,
             )
 
-            return record["action_count"] if record else 0
+        return await self.bot.action_counter.get(
+            interaction.author.user_id,
+            interaction.target.user_id,
+            interaction.int_type,
+        )
 
     async def get_total_count(self, interaction: Interaction) -> int:
-        async with self.bot.pool.acquire() as conn:
+        async with self.bot.db.read().acquire() as conn:
             record = await conn.fetchval(
                 """
                 SELECT SUM(action_count) FROM actions
@@ -107,7 +119,80 @@ class UserInteractionModule(commands.Cog, name="User Interactions"):
                 interaction.int_type,
             )
 
-            return record["action_count"] if record else 0
+            return record or 0
+
+    def _get_locale(self, user_id: int) -> str:
+        user = self.bot.user_cache.get_cached(user_id)
+        return user.locale if user is not None else "en_US"
+
+    async def _interact(self, ctx: Context[Yuno], action: str, member: Optional[discord.Member]) -> None:
+        assert ctx.guild is not None
+        locale = self._get_locale(ctx.author.id)
+
+        if member is None:
+            message = self.bot.translator.get_translation("errors.user_not_found", locale)
+            return await YunoCommandError(str(message).format(user=ctx.current_argument or "")).handle(ctx)
+
+        # Only the IDs are needed; missing users are created when the counters are written
+        interaction = Interaction(
+            action,
+            ctx.guild.id,
+            self.bot.user_cache.get_cached(ctx.author.id) or await YUser.fake_user(ctx.author.id),
+            self.bot.user_cache.get_cached(member.id) or await YUser.fake_user(member.id),
+        )
+        count = await self.insert_action(interaction)
+
+        template = self.interactions.get_template(action, locale)
+        embed = template.render(ctx.author.display_name, member.display_name, count)
+
+        if (asset := self.bot.assets.get_asset(action)) is None:
+            await ctx.send(embed=embed)
+        elif url := self.bot.assets.get_url(asset):
+            embed.set_image(url=url)
+            await ctx.send(embed=embed)
+        else:
+            # Not uploaded to the storage channel (yet), attach the file instead
+            embed.set_image(url=f"attachment://{asset.file_name}")
+            await ctx.send(embed=embed, file=self.bot.assets.get_file(asset))
+
+    @commands.command(name="pat")
+    async def pat(self, ctx: Context[Yuno], member: Optional[discord.Member] = FuzzyMemberConverter) -> None:
+        await self._interact(ctx, "pat", member)
+
+    @commands.command(name="lick")
+    async def lick(self, ctx: Context[Yuno], member: Optional[discord.Member] = FuzzyMemberConverter) -> None:
+        await self._interact(ctx, "lick", member)
+
+    @commands.command(name="poke")
+    async def poke(self, ctx: Context[Yuno], member: Optional[discord.Member] = FuzzyMemberConverter) -> None:
+        await self._interact(ctx, "poke", member)
+
+    @commands.command(name="leaderboard", aliases=["lb", "top"])
+    async def leaderboard(self, ctx: Context[Yuno], interaction: str, page: int = 1) -> None:
+        assert ctx.guild is not None
+
+        action_type = interaction.casefold()
+        board = await self.bot.leaderboard.get_board(ctx.guild.id, action_type)
+        entries = board.page(page, per_page=10)
+
+        locale = self._get_locale(ctx.author.id)
+
+        if not entries:
+            message = self.bot.translator.get_translation("general.no_results", locale)
+            await ctx.send(str(message).format(query=interaction))
+            return
+
+        lines = []
+        for rank, user_id, total in entries:
+            member = ctx.guild.get_member(user_id)
+            lines.append(f"**{rank}.** {member.display_name if member else f'<@{user_id}>'} \N{EM DASH} {total}")
+
+        message = self.bot.translator.get_translation("commands.leaderboard.message", locale)
+        embed = YEmbed.default(
+            ctx,
+            description=str(message).format(n=len(board), interaction=action_type, leaderboard="\n".join(lines)),
+        )
+        await ctx.send(embed=embed)
 
 
 async def setup(bot: Yuno) -> None:
@@ -41,7 +41,9 @@ class DiscordUserSettings(commands.Cog, name="⚙ Settings"):
         user = await self._cache_user(ctx.author.id)
 
         if ctx.invoked_subcommand is None:
-            message = self.bot.translator.get_translation(key="user_commands.userset.subcommands.fail", locale=user.locale)
+            message = self.bot.translator.get_translation(
+                key="commands.userset.subcommands.fallback_error", locale=user.locale
+            )
 
             return await ctx.send(f"❌ | {message}")
 
@@ -51,7 +53,7 @@ class DiscordUserSettings(commands.Cog, name="⚙ Settings"):
 
         if not self._is_valid_timezone(timezone):
             message = self.bot.translator.get_translation(
-                key="user_commands.userset.subcommands.timezone.fail", locale=user.locale
+                key="commands.userset.subcommands.timezone.fail", locale=user.locale
             )
 
             return await ctx.send(f"❌ | {str(message).format(timezone=timezone)}")
@@ -61,9 +63,10 @@ class DiscordUserSettings(commands.Cog, name="⚙ Settings"):
 
         async with self.bot.pool.acquire() as conn:
             await YUser.upsert_user(conn, user.user_id, time_zone=timezone, locale=user.locale)
+        await self.bot.broadcast_invalidation("users", user.user_id)
 
         message = self.bot.translator.get_translation(
-            key="user_commands.userset.subcommands.timezone.success", locale=user.locale
+            key="commands.userset.subcommands.timezone.success", locale=user.locale
         )
 
         return await ctx.send(f"✅ | {str(message).format(timezone=timezone)}")
@@ -74,7 +77,7 @@ class DiscordUserSettings(commands.Cog, name="⚙ Settings"):
 
         if not self.bot.translator.is_valid_locale(language):
             message = self.bot.translator.get_translation(
-                key="user_commands.userset.subcommands.language.fail",
+                key="commands.userset.subcommands.language.fail",
                 locale=user.locale,
             )
 
@@ -85,9 +88,10 @@ class DiscordUserSettings(commands.Cog, name="⚙ Settings"):
 
         async with self.bot.pool.acquire() as conn:
             await YUser.upsert_user(conn, user.user_id, time_zone=user.time_zone, locale=language)
+        await self.bot.broadcast_invalidation("users", user.user_id)
 
         message = self.bot.translator.get_translation(
-            key="user_commands.userset.subcommands.language.success",
+            key="commands.userset.subcommands.language.success",
             locale=user.locale,
         )
 
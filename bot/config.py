@@ -1,5 +1,6 @@
 import logging
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -19,6 +20,39 @@ class Config:
     POSTGRES_PORT = os.getenv("POSTGRES_PORT")
     OWNER_IDS = os.getenv("OWNER_IDS", "").split(",")
     RUN_DB_MIGRATIONS = os.getenv("RUN_DB_MIGRATIONS", "False").lower() == "true"
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "50000")) or None
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "0")) or None
+    USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", "60"))
+    TRANSLATION_RELOAD_INTERVAL = float(os.getenv("TRANSLATION_RELOAD_INTERVAL", "2"))
+    WARMUP_CHUNK_SIZE = int(os.getenv("WARMUP_CHUNK_SIZE", "1000"))
+    ACTION_FLUSH_INTERVAL = float(os.getenv("ACTION_FLUSH_INTERVAL", "10"))
+    ACTION_COUNT_TTL = float(os.getenv("ACTION_COUNT_TTL", "60"))
+    LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+    LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", "300"))
+    LEADERBOARD_FLUSH_INTERVAL = float(os.getenv("LEADERBOARD_FLUSH_INTERVAL", "10"))
+    ASSET_CHANNEL_ID = int(os.getenv("ASSET_CHANNEL_ID", "0")) or None
+    ASSET_FORMATS = os.getenv("ASSET_FORMATS", "gif").split(",")
+    ASSET_MAX_BYTES = int(os.getenv("ASSET_MAX_BYTES", str(8 * 2**20)))
+    # Comma separated DSNs of read replicas for reads that may be stale
+    REPLICA_DSNS = [dsn for dsn in os.getenv("POSTGRES_REPLICA_DSNS", "").split(",") if dsn]
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))
+    REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+    # "memory" limits each process on its own, "postgres" shares the limits across processes
+    RATELIMIT_BACKEND = os.getenv("RATELIMIT_BACKEND", "memory").lower()
+    IPC_DIRECTORY = Path(os.getenv("IPC_DIRECTORY", Path(tempfile.gettempdir()) / "yuno-ipc"))
+    IPC_TIMEOUT = float(os.getenv("IPC_TIMEOUT", "5"))
+    # /metrics is served on METRICS_PORT + cluster id when clustered, 0 disables it
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+    # Fraction of commands traced, 0 turns tracing off; traces go to TRACE_FILE or, with "otlp", a collector
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl").lower()
+    TRACE_FILE = Path(os.getenv("TRACE_FILE", "traces.jsonl"))
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces")
+    # Writes redacted gateway events for benchmarks/bench_replay.py when set; comma separated events, default all
+    GATEWAY_RECORD_FILE = Path(os.environ["GATEWAY_RECORD_FILE"]) if os.getenv("GATEWAY_RECORD_FILE") else None
+    GATEWAY_RECORD_EVENTS = [event for event in os.getenv("GATEWAY_RECORD_EVENTS", "").split(",") if event]
     DEFAULT_COLOR = 0x2F3136
     VERSION = "0.0.1"
 
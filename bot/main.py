@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import collections
+import contextlib
 import datetime
 import difflib
 import functools
@@ -11,8 +12,9 @@ import logging
 import os
 import pathlib
 import re
-from collections import defaultdict
-from typing import TYPE_CHECKING, Any, DefaultDict, Optional
+import signal
+import time
+from typing import TYPE_CHECKING, Any, Optional
 
 import aiohttp
 import asyncpg
@@ -20,9 +22,42 @@ import discord
 from discord import Interaction, Message
 from discord.ext import commands, tasks
 
-from .classes import Translator, YEmbed, YGuild, YUser
+from .classes import AssetManager, Leaderboard, Translator, YEmbed, YGuild, YUser
 from .config import Config
-from .utils import AsyncUserCache, CaseInsensitiveDict
+from .utils import (
+    ActionCounterBuffer,
+    AsyncUserCache,
+    BotMetrics,
+    CaseInsensitiveDict,
+    DatabaseRouter,
+    GatewayRecorder,
+    GuildLocation,
+    IPCNode,
+    JsonLinesExporter,
+    MemoryRateLimitBackend,
+    MessageDeleteScheduler,
+    MetricsServer,
+    OTLPExporter,
+    PostgresListener,
+    PostgresRateLimitBackend,
+    PrefixIndex,
+    RateLimitBackend,
+    SingleFlightLoader,
+    StartupTimer,
+    TraceExporter,
+    Tracer,
+    WarmupStats,
+    YunoConnection,
+    apply_migrations,
+    create_timed_pool,
+    enforce_ratelimit,
+    instrument_http,
+    peak_memory_mb,
+    prepare_queries,
+    queries,
+    tracing,
+    warm_from_query,
+)
 
 if TYPE_CHECKING:
     from discord.ext.commands import Context
@@ -31,7 +66,7 @@ log = logging.getLogger(__name__)
 config = Config()
 
 
-class Yuno(commands.Bot):
+class Yuno(commands.AutoShardedBot):
     def __init__(
         self,
         token: str,
@@ -40,6 +75,10 @@ class Yuno(commands.Bot):
         *,
         session: Optional[aiohttp.ClientSession] = None,
         intents: discord.Intents,
+        cluster_id: Optional[int] = None,
+        cluster_count: int = 1,
+        migrations: bool = False,
+        startup: Optional[StartupTimer] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(
@@ -54,37 +93,177 @@ class Yuno(commands.Bot):
         )
         self.dns = dns
         self.token = token
+        self.cluster_id = cluster_id
+        self.startup = startup or StartupTimer()
+        self._run_migrations = migrations
         self.session = session
         self.config = Config()
         self._admin_only: bool = False
         self.strip_after_prefix = True
         self.uptime: datetime.datetime
         self.pool: asyncpg.pool.Pool = pool
+        # self.pool is the primary; reads that may be stale can go through self.db.read() instead
+        self.db = DatabaseRouter(
+            pool,
+            self.config.REPLICA_DSNS,
+            connect=functools.partial(self.setup_db, migrations=False),
+            max_lag=self.config.REPLICA_MAX_LAG,
+            check_interval=self.config.REPLICA_CHECK_INTERVAL,
+        )
         self.translator = Translator()
+        self.assets = AssetManager(
+            self,
+            channel_id=self.config.ASSET_CHANNEL_ID,
+            formats=self.config.ASSET_FORMATS,
+            max_bytes=self.config.ASSET_MAX_BYTES,
+            # One uploader per cluster; the other workers read the URLs it stores
+            upload=not cluster_id,
+        )
 
         self.OWNER_IDS: list[int] = self.config.get_owner_ids()
         self._extensions_loaded: asyncio.Event = asyncio.Event()
-        self._extensions = [p.stem for p in pathlib.Path(".").glob("./bot/cogs/*.py")]
-
-        self.user_cache = AsyncUserCache()
+        self._warmup_task: Optional[asyncio.Task[None]] = None
+        self._extensions = [p.stem for p in (pathlib.Path(__file__).parent / "cogs").glob("*.py")]
+
+        # Concurrent misses for the same key share one in-flight query
+        self.user_loader: SingleFlightLoader[int, YUser] = SingleFlightLoader(self._load_users)
+        self.guild_loader: SingleFlightLoader[int, YGuild] = SingleFlightLoader(self._load_guilds)
+        self.prefix_loader: SingleFlightLoader[int, list[str]] = SingleFlightLoader(self._load_prefixes)
+
+        self.user_cache = AsyncUserCache(
+            max_size=self.config.USER_CACHE_MAX_SIZE,
+            ttl=self.config.USER_CACHE_TTL,
+            negative_ttl=self.config.USER_CACHE_NEGATIVE_TTL,
+            loader=SingleFlightLoader(self._ensure_users),
+        )
+        # Without write-behind every interaction is written straight through with record_action
+        self.action_counter: Optional[ActionCounterBuffer] = None
+        if self.config.ACTION_FLUSH_INTERVAL > 0:
+            self.action_counter = ActionCounterBuffer(
+                pool, flush_interval=self.config.ACTION_FLUSH_INTERVAL, base_ttl=self.config.ACTION_COUNT_TTL
+            )
+        self.leaderboard = Leaderboard(
+            self.db,
+            size=self.config.LEADERBOARD_SIZE,
+            refresh_interval=self.config.LEADERBOARD_REFRESH_INTERVAL,
+            flush_interval=self.config.LEADERBOARD_FLUSH_INTERVAL,
+        )
+        self.message_scheduler = MessageDeleteScheduler()
+        self.ratelimits: RateLimitBackend = (
+            PostgresRateLimitBackend(pool) if self.config.RATELIMIT_BACKEND == "postgres" else MemoryRateLimitBackend()
+        )
+        # Counted here rather than in a check, which the help command also runs
+        self.before_invoke(enforce_ratelimit)
         self.cached_guilds: dict[int, YGuild] = {}
-        self.cached_prefixes: DefaultDict[int, list[re.Pattern[str]]] = defaultdict(list)
+        self.cached_prefixes = PrefixIndex(default=("y",))
+
+        # Other processes' writes to users, guilds and prefix evict our cached copies
+        self.cache_listener = PostgresListener(
+            dns,
+            "yuno_cache",
+            self._on_cache_notification,
+            on_reconnect=self.clear_caches,
+        )
+
+        # Only a process started by bot.cluster has peers to talk to
+        self.ipc: Optional[IPCNode] = None
+        if cluster_id is not None:
+            self.ipc = IPCNode(cluster_id, cluster_count, self.config.IPC_DIRECTORY, timeout=self.config.IPC_TIMEOUT)
+            self.ipc.add_handler("guild_count", self._ipc_guild_count)
+            self.ipc.add_handler("locate_guild", self._ipc_locate_guild)
+            self.ipc.add_handler("invalidate", self._ipc_invalidate)
+
+        self.metrics = BotMetrics(self, lag_interval=self.config.LOOP_LAG_INTERVAL)
+        self.metrics_server: Optional[MetricsServer] = None
+        if self.config.METRICS_PORT:
+            self.metrics_server = MetricsServer(
+                self.metrics.registry,
+                self.config.METRICS_HOST,
+                self.config.METRICS_PORT + (cluster_id or 0),
+            )
+
+        exporter: Optional[TraceExporter] = None
+        if self.config.TRACE_SAMPLE_RATE > 0:
+            if self.config.TRACE_EXPORTER == "otlp":
+                exporter = OTLPExporter(self.config.TRACE_OTLP_ENDPOINT)
+            else:
+                exporter = JsonLinesExporter(self.config.TRACE_FILE)
+        self.tracer = Tracer(self.config.TRACE_SAMPLE_RATE, exporter)
+        if self.tracer.enabled:
+            instrument_http(self.http)
+
+        self.recorder: Optional[GatewayRecorder] = None
+        if (record_file := self.config.GATEWAY_RECORD_FILE) is not None:
+            if cluster_id is not None:
+                record_file = record_file.with_name(f"{cluster_id}-{record_file.name}")
+            self.recorder = GatewayRecorder(
+                record_file,
+                events=self.config.GATEWAY_RECORD_EVENTS,
+                command_length=self._command_length,
+            )
+            self.recorder.install(self._connection.parsers)
+
+    async def _load_cogs(self) -> None:
+        with self.startup.phase("cogs"):
+            await asyncio.gather(*(self.load_extension(f"bot.cogs.{extension}") for extension in self._extensions))
+
+        self._extensions_loaded.set()
+
+    async def _load_translations(self) -> None:
+        with self.startup.phase("translations"):
+            await self.translator.load_translations()
+
+        if self.config.TRANSLATION_RELOAD_INTERVAL > 0:
+            self.translator.start_watching(self.config.TRANSLATION_RELOAD_INTERVAL)
+
+    async def _prepare_database(self) -> None:
+        if self._run_migrations:
+            with self.startup.phase("migrations"):
+                # Statements prepared before the schema changed may be stale, so start from fresh connections
+                if await apply_migrations(self.pool):
+                    await self.pool.expire_connections()
+
+        # Everything below needs the tables the migrations create
+        if self.action_counter is not None:
+            self.action_counter.start()
+        self.leaderboard.start()
+        self.ratelimits.start()
+
+        # Runs in the background so it never holds up on_ready
+        self._warmup_task = asyncio.create_task(self.warm_caches())
 
     async def setup_hook(self) -> None:
         if self.session is None:
             self.session = aiohttp.ClientSession()
 
-        for extension in self._extensions:
-            await self.load_extension(f"bot.cogs.{extension}")
+        # None of these depend on each other, so they overlap instead of running back to back
+        await asyncio.gather(
+            self._load_cogs(),
+            self._load_translations(),
+            self._prepare_database(),
+            self.cache_listener.start(),
+            self.db.start(),
+        )
 
-        self._extensions_loaded.set()
+        self.message_scheduler.start()
+        self.metrics.start()
+        self.tracer.start()
+
+        if self.recorder is not None:
+            self.recorder.start()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+
+        if self.ipc is not None:
+            await self.ipc.start()
+
+        if self.user is not None:
+            self.cached_prefixes.set_mentions(self.user.id)
 
         if not hasattr(self, 'uptime'):
             self.uptime = discord.utils.utcnow()
 
-        # Load translation files into memory
-        await self.translator.load_translations()
-
     @classmethod
     async def setup_db(cls, dsn: str, migrations: bool = True) -> asyncpg.pool.Pool:
         def serializer(obj: Any) -> str:
@@ -101,109 +280,387 @@ class Yuno(commands.Bot):
                 schema="pg_catalog",
                 format="text",
             )
+            await prepare_queries(conn)
 
-        pool = await asyncpg.create_pool(dsn, init=init)
+        pool = await create_timed_pool(dsn, init=init, connection_class=YunoConnection)
 
         if migrations:
-            sql_path = pathlib.Path("./bot/sql")
-            sql_files = sorted(sql_path.glob("*.sql"))
-
-            async with pool.acquire() as conn:
-                for n, sql_file in enumerate(sql_files, 1):
-                    log.info(f"Running migration {n}/{len(sql_files)}: {sql_file.name}")
-                    with open(sql_file, "r") as f:
-                        await conn.execute(f.read())
+            await apply_migrations(pool)  # type: ignore (TimedPool forwards the rest of asyncpg.Pool)
 
-        return pool
+        return pool  # type: ignore
 
     async def on_ready(self) -> None:
         log.info(f"Logged in as {self.user} (ID: {self.user.id})")  # type: ignore (user is not None)
-        log.info(f"Running on {len(self.guilds)} guilds")
+        log.info(f"Running on {len(self.guilds)} guilds ({await self.total_guild_count()} in total)")
+        self.startup.finish()
+
+        # on_ready fires again after reconnects; start() is a no-op while the sync loop runs
+        self.assets.start()
 
     async def on_message(self, message: Message) -> None:
         if message.author.bot:
             return
 
-        ctx = await self.get_context(message)
-        await self.invoke(ctx)
-
-    async def fill_user_cache(self) -> None:
-        async with self.pool.acquire() as conn:
-            records = await conn.fetch("SELECT * FROM users")
+        if (trace := self.tracer.trace("message")) is None:
+            ctx = await self.get_context(message)
+            return await self.invoke(ctx)
+
+        with trace as root:
+            with tracing.span("get_context"):
+                ctx = await self.get_context(message)
+
+            # Always invoked, so a sampled message behaves like any other, e.g. dispatches CommandNotFound
+            with tracing.span("invoke"):
+                await self.invoke(ctx)
+
+            # Only commands are worth keeping
+            if ctx.command is None:
+                return root.discard()
+
+            root.set("command", ctx.command.qualified_name)
+            root.set("guild_id", ctx.guild.id if ctx.guild is not None else 0)
+            if ctx.command_failed:
+                root.set("failed", True)
+
+    async def invoke(self, ctx: Context[Any], /) -> None:
+        # Timed here rather than in on_command/on_command_completion, which run as separate tasks
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        started = time.perf_counter()
+        await super().invoke(ctx)
+        elapsed = time.perf_counter() - started
+
+        series = self.metrics.command(ctx.command)
+        if ctx.command_failed:
+            series.errors.inc()
+        else:
+            series.latency.observe(elapsed)
+
+    def _on_cache_notification(self, payload: str) -> None:
+        table, key, *flags = payload.split(":")
+        object_id = int(key)
+        # A new row can only be cached as missing; a copy this process cached right after inserting it is current
+        inserted = flags == ["insert"]
+
+        if table == "users":
+            if not inserted or self.user_cache.is_missing(object_id):
+                self.user_cache.invalidate(object_id)
+        elif table == "guilds":
+            # Guilds that don't exist aren't cached
+            if not inserted:
+                self.cached_guilds.pop(object_id, None)
+        elif table == "prefix":
+            # A new prefix changes the guild's whole list
+            self.cached_prefixes.invalidate(object_id)
+        else:
+            log.warning(f"Unknown cache notification: {payload!r}")
+
+    async def _ipc_guild_count(self, _: None) -> int:
+        return len(self.guilds)
+
+    async def _ipc_locate_guild(self, guild_id: int) -> Optional[int]:
+        guild = self.get_guild(guild_id)
+        return guild.shard_id if guild is not None else None
+
+    async def _ipc_invalidate(self, payload: str) -> None:
+        self._on_cache_notification(payload)
+
+    async def total_guild_count(self) -> int:
+        """The number of guilds across every process of the cluster"""
+        if self.ipc is None:
+            return len(self.guilds)
+
+        counts = await self.ipc.gather("guild_count")
+        return sum(counts.values())
+
+    async def locate_guild(self, guild_id: int) -> Optional[GuildLocation]:
+        """Find the process and shard that have the guild, or None if the bot isn't in it"""
+        if self.ipc is None:
+            guild = self.get_guild(guild_id)
+            return GuildLocation(0, guild.shard_id) if guild is not None else None
+
+        shards = await self.ipc.gather("locate_guild", guild_id)
+        return next(
+            (GuildLocation(cluster_id, shard_id) for cluster_id, shard_id in shards.items() if shard_id is not None),
+            None,
+        )
 
-        for record in records:
-            if record["user_id"] in self.user_cache._cache:
-                continue
+    async def broadcast_invalidation(self, table: str, object_id: int) -> None:
+        """Evict a cached row from the other processes of the cluster
+
+        This process is expected to have updated its own copy already.
+        """
+        if self.ipc is not None:
+            await self.ipc.broadcast("invalidate", f"{table}:{object_id}")
+
+    def clear_caches(self) -> None:
+        self.user_cache.clear()
+        self.cached_guilds.clear()
+        self.cached_prefixes.clear()
+        log.info("Cleared the user, guild and prefix caches")
+
+    async def fill_user_cache(self) -> WarmupStats:
+        def apply(chunk: list[asyncpg.Record]) -> None:
+            self.user_cache.set_many(YUser(record) for record in chunk if record["user_id"] not in self.user_cache)
+
+        # LIMIT NULL means no limit; past max_size the LRU would only evict what we just loaded
+        return await warm_from_query(
+            self.db.write(),
+            "users",
+            "SELECT user_id, time_zone, locale, added_at FROM users LIMIT $1",
+            self.user_cache.max_size,
+            apply=apply,
+            chunk_size=self.config.WARMUP_CHUNK_SIZE,
+        )
 
-            user = YUser(record)
-            await self.user_cache.set_user(user)
+    async def fill_guild_cache(self) -> WarmupStats:
+        def apply(chunk: list[asyncpg.Record]) -> None:
+            for record in chunk:
+                if record["guild_id"] not in self.cached_guilds:
+                    self.cached_guilds[record["guild_id"]] = YGuild(record)
+
+        return await warm_from_query(
+            self.db.write(),
+            "guilds",
+            "SELECT guild_id, locale, added_at FROM guilds",
+            apply=apply,
+            chunk_size=self.config.WARMUP_CHUNK_SIZE,
+        )
 
-    async def fill_guild_cache(self) -> None:
-        async with self.pool.acquire() as conn:
-            records = await conn.fetch("SELECT * FROM guilds")
+    async def fill_prefix_cache(self) -> WarmupStats:
+        # Rows come ordered by guild, so a guild's list is complete once the next guild starts
+        guild_id: Optional[int] = None
+        prefixes: list[str] = []
+
+        def complete() -> None:
+            # A guild loaded or invalidated meanwhile keeps what it has, rather than a mix of both reads
+            if guild_id is not None and guild_id not in self.cached_prefixes:
+                self.cached_prefixes.set(guild_id, prefixes)
+
+        def apply(chunk: list[asyncpg.Record]) -> None:
+            nonlocal guild_id, prefixes
+            for record in chunk:
+                if record["guild_id"] != guild_id:
+                    complete()
+                    guild_id, prefixes = record["guild_id"], []
+                prefixes.append(record["prefix"])
+
+        stats = await warm_from_query(
+            self.db.write(),
+            "prefix",
+            "SELECT guild_id, prefix FROM prefix ORDER BY guild_id, prefix_id",
+            apply=apply,
+            chunk_size=self.config.WARMUP_CHUNK_SIZE,
+        )
+        complete()
+        return stats
+
+    async def warm_caches(self) -> None:
+        """Fill the user, guild and prefix caches concurrently, each on its own connection
+
+        They are read from the primary: its NOTIFYs invalidate these caches, and a
+        lagging replica could re-cache a row that an invalidation has already evicted.
+        """
+        with self.startup.phase("warmup"):
+            results = await asyncio.gather(
+                self.fill_user_cache(),
+                self.fill_guild_cache(),
+                self.fill_prefix_cache(),
+                return_exceptions=True,
+            )
 
-        for record in records:
-            if record["guild_id"] in self.cached_guilds:
-                continue
+        for result in results:
+            if isinstance(result, BaseException):
+                log.error(f"Cache warm-up failed: {result!r}")
+            else:
+                log.info(f"Warmed cache {result}")
 
-            guild = YGuild(record)
-            self.cached_guilds[guild.guild_id] = guild
+        if (peak := peak_memory_mb()) is not None:
+            log.info(f"Peak memory after cache warm-up: {peak:.1f} MiB")
 
-    async def fill_prefix_cache(self) -> None:
+    async def _load_users(self, user_ids: list[int]) -> dict[int, YUser]:
         async with self.pool.acquire() as conn:
-            records = await conn.fetch("SELECT * FROM prefix")
+            users = await YUser.get_many(conn, user_ids)
 
-        for record in records:
-            if record["guild_id"] in self.cached_prefixes:
-                self.cached_prefixes[record["guild_id"]].append(record["prefix"])
-            else:
-                self.cached_prefixes[record["guild_id"]] = [record["prefix"]]
+        return {user.user_id: user for user in users}
 
-        log.debug(self.cached_prefixes)
+    async def _ensure_users(self, user_ids: list[int]) -> dict[int, YUser]:
+        async with self.pool.acquire() as conn:
+            users = await YUser.ensure_many(conn, user_ids)
 
-    async def get_prefix(self, message: discord.Message, /) -> str | list[str]:
-        if message.guild is None:
-            if match := re.match(re.escape('y'), message.content, re.I):
-                return match.group(0)
+        return {user.user_id: user for user in users}
 
-            return commands.when_mentioned_or(*("y", "y "))(self, message)
+    async def _load_guilds(self, guild_ids: list[int]) -> dict[int, YGuild]:
+        async with self.pool.acquire() as conn:
+            guilds = await YGuild.get_many(conn, guild_ids)
 
-        if not message.guild.id in self.cached_prefixes:
-            prefix_query = "SELECT prefix from prefix WHERE guild_id = $1"
-            async with self.pool.acquire() as conn:
-                records = await conn.fetch(prefix_query, message.guild.id)
-                pattern = re.compile("|".join([re.escape(r["prefix"]) for r in records]), re.I)
+        return {guild.guild_id: guild for guild in guilds}
 
-                self.cached_prefixes[message.guild.id] = [pattern]
+    async def _load_prefixes(self, guild_ids: list[int]) -> dict[int, list[str]]:
+        records = await queries.fetch(self.pool, queries.GET_PREFIXES, guild_ids)
 
-        if match := self.cached_prefixes[message.guild.id][0].match(message.content):
-            return match.group(0)
+        prefixes: dict[int, list[str]] = {guild_id: [] for guild_id in guild_ids}
+        for record in records:
+            prefixes[record["guild_id"]].append(record["prefix"])
 
-        return commands.when_mentioned(self, message)
+        return prefixes
+
+    async def get_prefix(self, message: discord.Message, /) -> str | list[str]:
+        index = self.cached_prefixes
+        metrics = self.metrics
+        started = time.perf_counter()
+
+        try:
+            with tracing.span("get_prefix"):
+                if message.guild is None:
+                    prefixes = index.default
+                elif (prefixes := index.get(message.guild.id)) is not None:
+                    metrics.prefix_hits.inc()
+                else:
+                    metrics.prefix_misses.inc()
+                    prefixes = index.set(message.guild.id, await self.prefix_loader.load(message.guild.id) or ())
+
+                if prefix := index.match(message.content, prefixes):
+                    return prefix
+
+                return index.mentions
+        finally:
+            metrics.prefix_latency.observe(time.perf_counter() - started)
+
+    def _command_length(self, message: dict[str, Any]) -> int:
+        """How much of a raw message is the prefix and the name of a command, 0 if it isn't one
+
+        Lets the gateway recorder keep exactly that part of the content.
+        """
+        content: str = message.get("content", "")
+        index = self.cached_prefixes
+        guild_id = message.get("guild_id")
+        prefixes = index.default if guild_id is None else index.get(int(guild_id)) or index.default
+
+        prefix = index.match(content, prefixes) or next((m for m in index.mentions if content.startswith(m)), None)
+        if prefix is None:
+            return 0
+
+        rest = content[len(prefix) :]
+        stripped = rest.lstrip()
+        name = stripped.split(maxsplit=1)[0] if stripped else ""
+        if name not in self.all_commands:
+            return 0
+
+        return len(content) - len(stripped) + len(name)
 
     async def add_user(self, user_id: int) -> YUser:
         async with self.pool.acquire() as conn:
             return await self.user_cache.upsert_user(conn, user_id)
 
     async def find_user(self, user_id: int) -> Optional[YUser]:
-        if user := await self.user_cache.get_user(user_id):
+        if user := self.user_cache.get_cached(user_id):
             return user
 
-        async with self.pool.acquire() as conn:
-            return await YUser.get_user(conn, user_id)
+        if self.user_cache.is_missing(user_id):
+            return None
+
+        user = await self.user_loader.load(user_id)
+
+        if user is None:
+            self.user_cache.set_missing(user_id)
+        else:
+            await self.user_cache.set_user(user)
+
+        return user
+
+    async def find_guild(self, guild_id: int) -> Optional[YGuild]:
+        if guild := self.cached_guilds.get(guild_id):
+            self.metrics.guild_hits.inc()
+            return guild
+
+        self.metrics.guild_misses.inc()
+        if guild := await self.guild_loader.load(guild_id):
+            self.cached_guilds[guild_id] = guild
+
+        return guild
 
     async def insert_many_users(self, users: list[YUser]) -> None:
         async with self.pool.acquire() as conn:
             await self.user_cache.insert_many(conn, users)
 
     async def close(self) -> None:
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+
+        self.ratelimits.close()
+        self.assets.close()
+        self.translator.stop_watching()
+        self.metrics.close()
+        await self.tracer.close()
+
+        if self.recorder is not None:
+            await self.recorder.close()
+        await self.cache_listener.close()
+        await self.message_scheduler.close()
+
+        if self.ipc is not None:
+            await self.ipc.close()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+
+        if self.action_counter is not None:
+            try:
+                await self.action_counter.close()
+            except Exception as e:
+                log.error(f"Failed to flush action counters on close: {e!r}")
+
+        try:
+            await self.leaderboard.close()
+        except Exception as e:
+            log.error(f"Failed to flush leaderboard counts on close: {e!r}")
+
+        await self.db.close()
+
         closables = [self.session, self.pool]
         await asyncio.gather(*[c.close() for c in closables if c is not None])
 
         await super().close()
 
 
-def main() -> None:
+def get_intents() -> discord.Intents:
+    return discord.Intents(
+        guilds=True,
+        members=True,
+        messages=True,
+        message_content=True,
+    )
+
+
+def main(
+    shard_ids: Optional[list[int]] = None,
+    shard_count: Optional[int] = None,
+    *,
+    cluster_id: Optional[int] = None,
+    cluster_count: int = 1,
+    migrations: bool = True,
+    profile_startup: Optional[pathlib.Path] = None,
+) -> None:
+    """Run the bot in this process
+
+    Parameters
+    ----------
+    shard_ids : Optional[list[int]], optional
+        The shards this process runs, by default every shard
+    shard_count : Optional[int], optional
+        The total number of shards across all processes, required with ``shard_ids``
+    cluster_id : Optional[int], optional
+        The id of this process when run by ``bot.cluster``, by default None
+    cluster_count : int, optional
+        The number of processes in the cluster, by default 1
+    migrations : bool, optional
+        Whether to run the migrations during startup, by default True
+    profile_startup : Optional[pathlib.Path], optional
+        Where to write a cProfile report of everything up to on_ready, by default no profiling
+    """
+    startup = StartupTimer(profile_startup)
     discord.utils.setup_logging()
     token = config.TOKEN
 
@@ -211,20 +668,32 @@ def main() -> None:
         return log.error("No token provided. Please set the DISCORD_TOKEN environment variable.")
 
     dsn = config.get_dsn()
-
-    intents = discord.Intents(
-        guilds=True,
-        members=True,
-        messages=True,
-        message_content=True,
-    )
+    intents = get_intents()
 
     async def _startup() -> None:
-
         async with aiohttp.ClientSession() as session:
-            pool = await Yuno.setup_db(dsn, migrations=True)
-            bot = Yuno(token, dsn, session=session, intents=intents, pool=pool)
+            with startup.phase("database"):
+                pool = await Yuno.setup_db(dsn, migrations=False)
+
+            bot = Yuno(
+                token,
+                dsn,
+                session=session,
+                intents=intents,
+                pool=pool,
+                shard_ids=shard_ids,
+                shard_count=shard_count,
+                cluster_id=cluster_id,
+                cluster_count=cluster_count,
+                migrations=migrations,
+                startup=startup,
+            )
             bot._BotBase__cogs = CaseInsensitiveDict()  # type: ignore
+
+            # The cluster supervisor stops workers with SIGTERM; close properly so buffered writes are flushed
+            with contextlib.suppress(NotImplementedError):
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+
             await bot.start(token)
 
     asyncio.run(_startup())
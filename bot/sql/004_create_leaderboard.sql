@@ -0,0 +1,12 @@
+-- actions has no guild, so per guild leaderboards are counted here
+CREATE TABLE IF NOT EXISTS guild_actions (
+    guild_id BIGINT NOT NULL,
+    action_type VARCHAR(255) NOT NULL,
+    user_id BIGINT NOT NULL,
+    action_count BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, action_type, user_id)
+);
+
+-- Serves the top K of a leaderboard without reading the rest of it
+CREATE INDEX IF NOT EXISTS guild_actions_rank_idx
+ON guild_actions (guild_id, action_type, action_count DESC);
@@ -0,0 +1,61 @@
+-- Payloads are "<table>:<id>", where id is the user_id for users and the guild_id otherwise.
+-- Inserts add ":insert": a new row can only be cached elsewhere as missing.
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS
+$BODY$
+DECLARE
+    changed RECORD;
+    payload TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'users' THEN
+        payload := 'users:' || changed.user_id;
+    ELSE
+        payload := TG_TABLE_NAME || ':' || changed.guild_id;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        payload := payload || ':insert';
+    END IF;
+
+    PERFORM pg_notify('yuno_cache', payload);
+    RETURN NULL;
+END;
+$BODY$
+LANGUAGE plpgsql;
+
+-- Upserts that change nothing, like ON CONFLICT DO UPDATE with the same values, don't notify
+DROP TRIGGER IF EXISTS users_cache_notify_trigger ON users;
+CREATE TRIGGER users_cache_notify_trigger
+AFTER INSERT OR DELETE ON users
+FOR EACH ROW EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS users_cache_notify_update_trigger ON users;
+CREATE TRIGGER users_cache_notify_update_trigger
+AFTER UPDATE ON users
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS guilds_cache_notify_trigger ON guilds;
+CREATE TRIGGER guilds_cache_notify_trigger
+AFTER INSERT OR DELETE ON guilds
+FOR EACH ROW EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS guilds_cache_notify_update_trigger ON guilds;
+CREATE TRIGGER guilds_cache_notify_update_trigger
+AFTER UPDATE ON guilds
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS prefix_cache_notify_trigger ON prefix;
+CREATE TRIGGER prefix_cache_notify_trigger
+AFTER INSERT OR DELETE ON prefix
+FOR EACH ROW EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS prefix_cache_notify_update_trigger ON prefix;
+CREATE TRIGGER prefix_cache_notify_update_trigger
+AFTER UPDATE ON prefix
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE notify_cache_invalidation();
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS assets (
+    content_hash CHAR(64) PRIMARY KEY,
+    file_name VARCHAR(255) NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    url TEXT NOT NULL,
+    uploaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,44 @@
+-- The parameters of these two shadowed the column names, so "user_id = user_id" matched every row.
+-- Parameter names can't be changed by CREATE OR REPLACE, hence the drops.
+DROP FUNCTION IF EXISTS insert_action(BIGINT, TEXT, BIGINT);
+CREATE FUNCTION insert_action(p_user_id BIGINT, p_action_type TEXT, p_target_id BIGINT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO actions (user_id, action_type, target_id, action_count)
+    VALUES (p_user_id, p_action_type, p_target_id, 1)
+    ON CONFLICT (user_id, target_id, action_type)
+    DO UPDATE SET action_count = actions.action_count + 1;
+$$;
+
+DROP FUNCTION IF EXISTS get_total_action_count(BIGINT, TEXT);
+CREATE FUNCTION get_total_action_count(p_user_id BIGINT, p_action_type TEXT)
+RETURNS BIGINT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(SUM(action_count), 0)::BIGINT FROM actions
+    WHERE user_id = p_user_id
+      AND action_type = p_action_type;
+$$;
+
+-- Creates both users if needed, counts the action and returns the new count in one round-trip
+CREATE OR REPLACE FUNCTION record_action(p_user_id BIGINT, p_target_id BIGINT, p_action_type TEXT, p_delta BIGINT DEFAULT 1)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_count BIGINT;
+BEGIN
+    INSERT INTO users (user_id)
+    VALUES (p_user_id), (p_target_id)
+    ON CONFLICT (user_id) DO NOTHING;
+
+    INSERT INTO actions (user_id, target_id, action_type, action_count)
+    VALUES (p_user_id, p_target_id, p_action_type, p_delta)
+    ON CONFLICT (user_id, target_id, action_type)
+    DO UPDATE SET action_count = actions.action_count + excluded.action_count
+    RETURNING action_count INTO new_count;
+
+    RETURN new_count;
+END $$;
@@ -0,0 +1,28 @@
+-- Unlogged: rate limits don't need to survive a crash, and skipping the WAL keeps hits cheap
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tat DOUBLE PRECISION NOT NULL  -- theoretical arrival time of the next request, as a UNIX timestamp
+);
+
+-- GCRA: returns 0 and counts the hit if it's allowed, otherwise the seconds until it would be
+CREATE OR REPLACE FUNCTION rate_limit_hit(p_key TEXT, p_interval DOUBLE PRECISION, p_tolerance DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    current_time_ DOUBLE PRECISION := EXTRACT(EPOCH FROM clock_timestamp());
+    arrival DOUBLE PRECISION;
+BEGIN
+    INSERT INTO rate_limits AS r (key, tat)
+    VALUES (p_key, current_time_ + p_interval)
+    ON CONFLICT (key) DO UPDATE
+    SET tat = GREATEST(r.tat, current_time_) + p_interval
+    WHERE r.tat - p_tolerance <= current_time_ + 1e-6;  -- rounding errors mustn't reject the last request of a burst
+
+    IF FOUND THEN
+        RETURN 0;
+    END IF;
+
+    SELECT tat INTO arrival FROM rate_limits WHERE key = p_key;
+    RETURN GREATEST(arrival - p_tolerance - current_time_, 0);
+END $$;
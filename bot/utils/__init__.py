@@ -1 +1,17 @@
+from .cache import *
+from .counters import *
+from .ipc import *
+from .loader import *
+from .metrics import *
+from .migrations import *
+from .notifications import *
+from .prefix import *
+from .queries import *
+from .ratelimit import *
+from .recorder import *
+from .routing import *
+from .scheduler import *
+from .startup import *
+from .tracing import *
 from .useful import *
+from .warmup import *
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Final, Iterable, NamedTuple, Optional
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from ..classes import YUser
+    from .loader import SingleFlightLoader
+
+
+__all__: tuple[str, ...] = (
+    "AsyncUserCache",
+    "CacheStats",
+)
+
+
+_MISSING: Final = object()
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AsyncUserCache:
+    """A bounded cache for storing user objects
+
+    Reads never await, so they don't need a lock: the event loop can't switch
+    tasks in the middle of a dictionary lookup. Entries are evicted in LRU order
+    once ``max_size`` is reached and, optionally, once they are older than ``ttl``.
+    User IDs that are known to be missing from the database can be stored as
+    negative entries so repeated lookups don't hit the database.
+
+    Parameters
+    ----------
+    max_size : Optional[int], optional
+        The maximum number of entries (including negative ones), by default 50_000.
+        ``None`` disables size based eviction.
+    ttl : Optional[float], optional
+        Seconds after which a user entry expires, by default None (never)
+    negative_ttl : float, optional
+        Seconds after which a negative entry expires, by default 60
+    loader : Optional[SingleFlightLoader[int, YUser]], optional
+        Coalesces the get-or-create queries of ``fetch_user`` misses, by default None
+
+    Attributes
+    ----------
+    _cache : OrderedDict[int, tuple[YUser | object, float]]
+        The cached entries in LRU order, mapped to their expiry time
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = 50_000,
+        ttl: Optional[float] = None,
+        negative_ttl: float = 60.0,
+        loader: Optional[SingleFlightLoader[int, YUser]] = None,
+    ) -> None:
+        if max_size is not None and max_size <= 0:
+            raise ValueError("max_size must be a positive integer or None")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.loader = loader
+
+        self._cache: OrderedDict[int, tuple[YUser | object, float]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, user_id: int) -> bool:
+        return self._lookup(user_id) not in (None, _MISSING)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._cache))
+
+    def _lookup(self, user_id: int) -> YUser | object | None:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._cache[user_id]
+            self._evictions += 1
+            return None
+
+        self._cache.move_to_end(user_id)
+        return value
+
+    def _store(self, user_id: int, value: YUser | object, ttl: Optional[float]) -> None:
+        self._cache[user_id] = (value, time.monotonic() + ttl if ttl else 0.0)
+        self._cache.move_to_end(user_id)
+
+        if self.max_size is not None:
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+
+    def get_cached(self, user_id: int) -> Optional[YUser]:
+        """Look up a user without awaiting
+
+        Returns
+        -------
+        Optional[YUser]
+            The cached user, or None on a miss or a negative entry
+        """
+        value = self._lookup(user_id)
+
+        if value is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        return None if value is _MISSING else value  # type: ignore
+
+    def is_missing(self, user_id: int) -> bool:
+        """Whether the user ID is cached as not existing in the database"""
+        return self._lookup(user_id) is _MISSING
+
+    def set_missing(self, user_id: int) -> None:
+        self._store(user_id, _MISSING, self.negative_ttl)
+
+    def invalidate(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def set_many(self, users: Iterable[YUser]) -> None:
+        for user in users:
+            self._store(user.user_id, user, self.ttl)
+
+    async def set_user(self, user: YUser) -> None:
+        self._store(user.user_id, user, self.ttl)
+
+    async def get_users(self) -> list[YUser]:
+        return [value for value, _ in self._cache.values() if value is not _MISSING]  # type: ignore
+
+    async def fetch_user(self, db: asyncpg.Connection, user_id: int) -> YUser:
+        if (user := self.get_cached(user_id)) is not None:
+            return user
+
+        if self.loader is None:
+            return await self.upsert_user(db, user_id)
+
+        user = await self.loader.load(user_id)
+        if user is None:
+            return await self.upsert_user(db, user_id)
+
+        self._store(user_id, user, self.ttl)
+        return user
+
+    async def get_user(self, user_id: int) -> Optional[YUser]:
+        return self.get_cached(user_id)
+
+    async def upsert_user(self, db: asyncpg.Connection, user_id: int) -> YUser:
+        from ..classes import YUser
+
+        user = await YUser.upsert_user(db, user_id)
+        self._store(user_id, user, self.ttl)
+
+        return user
+
+    async def insert_many(self, db: asyncpg.Connection, users: list[YUser]) -> None:
+        from ..classes import YUser
+
+        await YUser.insert_many(db, users)
+        self.set_many(users)
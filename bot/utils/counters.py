@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import asyncpg
+
+from . import queries
+from .loader import SingleFlightLoader
+
+__all__: tuple[str, ...] = (
+    "ActionKey",
+    "ActionCounterBuffer",
+)
+
+log = logging.getLogger(__name__)
+
+ActionKey = tuple[int, int, str]
+"""(user_id, target_id, action_type)"""
+
+
+class ActionCounterBuffer:
+    """A write-behind buffer for the counters in the ``actions`` table
+
+    Increments are kept in memory and written in bulk by ``flush``: the deltas
+    are copied into a temporary staging table and merged into ``actions`` with a
+    single ``INSERT ... ON CONFLICT DO UPDATE``. Reads are served from the last
+    persisted value plus the unflushed deltas.
+
+    Other cluster processes flush into the same rows, so a cached base value
+    is only trusted for ``base_ttl`` seconds. Every flush also replaces the
+    bases of the keys it wrote with the totals the merge returned, which
+    include the other processes' increments.
+
+    Parameters
+    ----------
+    pool : asyncpg.Pool
+        The pool used for loading base values and flushing
+    flush_interval : float, optional
+        Seconds between background flushes, by default 10
+    max_base_entries : int, optional
+        The maximum number of cached base values, by default 100_000
+    base_ttl : float, optional
+        Seconds a base value is used before it's loaded again, by default 60
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        *,
+        flush_interval: float = 10.0,
+        max_base_entries: int = 100_000,
+        base_ttl: float = 60.0,
+    ) -> None:
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_base_entries = max_base_entries
+        self.base_ttl = base_ttl
+
+        self._pending: dict[ActionKey, int] = {}
+        self._flushing: dict[ActionKey, int] = {}
+        self._base: dict[ActionKey, tuple[int, float]] = {}
+        """key -> (persisted count, monotonic time it expires at)"""
+        self._generation = 0
+
+        self._loader: SingleFlightLoader[ActionKey, int] = SingleFlightLoader(self._load_base)
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def _load_base(self, keys: list[ActionKey]) -> dict[ActionKey, int]:
+        user_ids, target_ids, action_types = zip(*keys)
+
+        records = await queries.fetch(self.pool, queries.GET_ACTION_COUNTS, user_ids, target_ids, action_types)
+
+        counts = {key: 0 for key in keys}
+        for record in records:
+            counts[(record["user_id"], record["target_id"], record["action_type"])] = record["action_count"]
+
+        return counts
+
+    def _cache_base(self, key: ActionKey, value: int) -> None:
+        # Re-inserting moves the key to the end, so the oldest entry is always first
+        self._base.pop(key, None)
+        if len(self._base) >= self.max_base_entries:
+            del self._base[next(iter(self._base))]
+
+        self._base[key] = (value, time.monotonic() + self.base_ttl)
+
+    def _get_base(self, key: ActionKey) -> Optional[int]:
+        if (entry := self._base.get(key)) is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._base[key]
+            return None
+
+        return value
+
+    def _unflushed(self, key: ActionKey) -> int:
+        return self._pending.get(key, 0) + self._flushing.get(key, 0)
+
+    async def get(self, user_id: int, target_id: int, action_type: str) -> int:
+        """Get the current count, including increments that haven't been flushed yet"""
+        key = (user_id, target_id, action_type)
+
+        while (base := self._get_base(key)) is None:
+            generation = self._generation
+            value = await self._loader.load(key) or 0
+
+            # A flush that committed while we were loading may or may not be in ``value``
+            if generation == self._generation:
+                self._cache_base(key, value)
+
+        return base + self._unflushed(key)
+
+    async def increment(self, user_id: int, target_id: int, action_type: str, delta: int = 1) -> int:
+        """Buffer an increment and return the new count"""
+        key = (user_id, target_id, action_type)
+        self._pending[key] = self._pending.get(key, 0) + delta
+
+        return await self.get(user_id, target_id, action_type)
+
+    async def flush(self) -> int:
+        """Write the buffered increments to the database
+
+        Returns
+        -------
+        int
+            The number of counters that were written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        totals = await self._write(conn, batch)
+            except Exception:
+                for key, delta in batch.items():
+                    self._pending[key] = self._pending.get(key, 0) + delta
+                raise
+            else:
+                self._generation += 1
+                for record in totals:
+                    key = (record["user_id"], record["target_id"], record["action_type"])
+                    if key in self._base:
+                        self._cache_base(key, record["action_count"])
+            finally:
+                self._flushing = {}
+
+            log.debug(f"Flushed {len(batch)} action counters")
+            return len(batch)
+
+    @staticmethod
+    async def _write(conn: asyncpg.Connection, batch: dict[ActionKey, int]) -> list[asyncpg.Record]:
+        await conn.execute(
+            """
+            CREATE TEMPORARY TABLE IF NOT EXISTS action_deltas (
+                user_id BIGINT NOT NULL,
+                target_id BIGINT NOT NULL,
+                action_type VARCHAR(255) NOT NULL,
+                delta BIGINT NOT NULL
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        await conn.copy_records_to_table(
+            "action_deltas",
+            records=[(user_id, target_id, action_type, delta) for (user_id, target_id, action_type), delta in batch.items()],
+        )
+        await conn.execute(
+            """
+            INSERT INTO users (user_id)
+            SELECT user_id FROM action_deltas
+            UNION
+            SELECT target_id FROM action_deltas
+            ON CONFLICT (user_id)
+            DO NOTHING
+            """
+        )
+        return await conn.fetch(
+            """
+            INSERT INTO actions (user_id, target_id, action_type, action_count)
+            SELECT user_id, target_id, action_type, delta FROM action_deltas
+            ON CONFLICT (user_id, target_id, action_type)
+            DO UPDATE SET action_count = actions.action_count + excluded.action_count
+            RETURNING user_id, target_id, action_type, action_count
+            """
+        )
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"Failed to flush action counters, retrying in {self.flush_interval}s: {e!r}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background flush and write whatever is left"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self.flush()
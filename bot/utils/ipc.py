@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+import orjson
+
+__all__: tuple[str, ...] = ("GuildLocation", "IPCError", "IPCNode")
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Awaitable[Any]]
+
+# Every frame is a 4 byte big-endian length followed by an orjson payload
+_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 2**20
+
+
+class GuildLocation(NamedTuple):
+    cluster_id: int
+    shard_id: int
+
+
+class IPCError(Exception):
+    """A peer could not be reached, didn't answer in time, or its handler failed"""
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > MAX_FRAME_SIZE:
+        raise IPCError(f"Frame of {size} bytes exceeds the limit of {MAX_FRAME_SIZE}")
+
+    message = orjson.loads(await reader.readexactly(size))
+    if not isinstance(message, dict):
+        raise IPCError(f"Expected a JSON object, got {type(message).__name__}")
+
+    return message
+
+
+def _write_frame(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    payload = orjson.dumps(message)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+
+class _Peer:
+    """An outgoing connection to another process, multiplexing requests by id"""
+
+    def __init__(self, cluster_id: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.cluster_id = cluster_id
+        self.reader = reader
+        self.writer = writer
+        self.pending: dict[int, asyncio.Future[Any]] = {}
+        self._ids = itertools.count()
+        self._task = asyncio.create_task(self._read_responses())
+
+    @property
+    def is_closed(self) -> bool:
+        return self._task.done()
+
+    async def _read_responses(self) -> None:
+        try:
+            while True:
+                message = await _read_frame(self.reader)
+                future = self.pending.pop(message["id"], None)
+                if future is None or future.done():
+                    continue
+
+                if "error" in message:
+                    future.set_exception(IPCError(f"Cluster {self.cluster_id}: {message['error']}"))
+                else:
+                    future.set_result(message.get("data"))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            log.debug(f"Lost IPC connection to cluster {self.cluster_id}: {e!r}")
+        except (IPCError, orjson.JSONDecodeError, KeyError) as e:
+            log.warning(f"Malformed IPC frame from cluster {self.cluster_id}, closing the connection: {e!r}")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(IPCError(f"Lost connection to cluster {self.cluster_id}"))
+            self.pending.clear()
+            self.writer.close()
+
+    async def request(self, method: str, data: Any, timeout: float) -> Any:
+        request_id = next(self._ids)
+        future = self.pending[request_id] = asyncio.get_running_loop().create_future()
+        _write_frame(self.writer, {"op": "request", "id": request_id, "method": method, "data": data})
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise IPCError(f"Cluster {self.cluster_id} didn't answer {method!r} within {timeout}s") from None
+        finally:
+            self.pending.pop(request_id, None)
+
+    def send(self, method: str, data: Any) -> None:
+        _write_frame(self.writer, {"op": "broadcast", "method": method, "data": data})
+
+    def close(self) -> None:
+        self._task.cancel()
+
+
+class IPCNode:
+    """Request/response and broadcast between the processes of a cluster
+
+    Every process listens on ``<directory>/yuno-<cluster_id>.sock`` and opens
+    a connection to each peer the first time it talks to it. A call to every
+    process is one round-trip each, made concurrently. Handlers are
+    registered by name and receive the decoded payload; whatever they
+    return is sent back as the response and must be serialisable by orjson.
+    A handler's local counterpart is called directly, without a socket.
+
+    Parameters
+    ----------
+    cluster_id : int
+        The id of this process
+    cluster_count : int
+        The number of processes in the cluster
+    directory : Path
+        Where the sockets live; every process of the cluster must use the same one
+    timeout : float, optional
+        Seconds to wait for a response, by default 5
+    """
+
+    def __init__(self, cluster_id: int, cluster_count: int, directory: Path, *, timeout: float = 5.0) -> None:
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.directory = directory
+        self.timeout = timeout
+
+        self.handlers: dict[str, Handler] = {}
+        self._peers: dict[int, _Peer] = {}
+        self._connecting: dict[int, asyncio.Lock] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task[Any]] = {}
+
+    def socket_path(self, cluster_id: int) -> Path:
+        return self.directory / f"yuno-{cluster_id}.sock"
+
+    @property
+    def peer_ids(self) -> list[int]:
+        return [cluster_id for cluster_id in range(self.cluster_count) if cluster_id != self.cluster_id]
+
+    def add_handler(self, method: str, handler: Handler) -> None:
+        self.handlers[method] = handler
+
+    def remove_handler(self, method: str) -> None:
+        self.handlers.pop(method, None)
+
+    async def _handle_request(self, writer: asyncio.StreamWriter, request_id: int, method: str, data: Any) -> None:
+        response: dict[str, Any] = {"op": "response", "id": request_id}
+
+        try:
+            response["data"] = await self._dispatch(method, data)
+        except Exception as e:
+            response["error"] = repr(e)
+
+        if not writer.is_closing():
+            _write_frame(writer, response)
+
+    async def _dispatch(self, method: str, data: Any) -> Any:
+        if (handler := self.handlers.get(method)) is None:
+            raise IPCError(f"No handler for {method!r}")
+
+        return await handler(data)
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks: set[asyncio.Task[None]] = set()
+        self._connections[writer] = asyncio.current_task()  # type: ignore
+
+        try:
+            while True:
+                message = await _read_frame(reader)
+
+                if message["op"] == "request":
+                    handle = self._handle_request(writer, message["id"], message["method"], message.get("data"))
+                    task = asyncio.create_task(handle)
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif message["op"] == "broadcast":
+                    try:
+                        await self._dispatch(message["method"], message.get("data"))
+                    except Exception as e:
+                        log.error(f"IPC broadcast handler {message['method']!r} failed: {e!r}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (IPCError, orjson.JSONDecodeError, KeyError) as e:
+            log.warning(f"Malformed IPC frame, closing the connection: {e!r}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _get_peer(self, cluster_id: int) -> _Peer:
+        if (peer := self._peers.get(cluster_id)) is not None and not peer.is_closed:
+            return peer
+
+        async with self._connecting.setdefault(cluster_id, asyncio.Lock()):
+            if (peer := self._peers.get(cluster_id)) is not None and not peer.is_closed:
+                return peer
+
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.socket_path(cluster_id)), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise IPCError(f"Can't connect to cluster {cluster_id}: {e!r}") from None
+
+            peer = self._peers[cluster_id] = _Peer(cluster_id, reader, writer)
+            return peer
+
+    async def request(self, cluster_id: int, method: str, data: Any = None, *, timeout: Optional[float] = None) -> Any:
+        """Call ``method`` on one process and return its result
+
+        Raises
+        ------
+        IPCError
+            The process could not be reached, timed out, or its handler raised
+        """
+        if cluster_id == self.cluster_id:
+            return await self._dispatch(method, data)
+
+        peer = await self._get_peer(cluster_id)
+        return await peer.request(method, data, timeout or self.timeout)
+
+    async def gather(self, method: str, data: Any = None, *, timeout: Optional[float] = None) -> dict[int, Any]:
+        """Call ``method`` on every process, including this one
+
+        Processes that fail or time out are logged and left out of the result.
+        """
+        cluster_ids = range(self.cluster_count)
+        results = await asyncio.gather(
+            *(self.request(cluster_id, method, data, timeout=timeout) for cluster_id in cluster_ids),
+            return_exceptions=True,
+        )
+
+        responses: dict[int, Any] = {}
+        for cluster_id, result in zip(cluster_ids, results):
+            if isinstance(result, Exception):
+                log.warning(f"IPC {method!r} to cluster {cluster_id} failed: {result!r}")
+            else:
+                responses[cluster_id] = result
+
+        return responses
+
+    async def broadcast(self, method: str, data: Any = None) -> None:
+        """Send ``method`` to every other process without waiting for it to be handled"""
+        for cluster_id in self.peer_ids:
+            try:
+                peer = await self._get_peer(cluster_id)
+                peer.send(method, data)
+            except IPCError as e:
+                log.warning(f"IPC broadcast {method!r} to cluster {cluster_id} failed: {e!r}")
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.socket_path(self.cluster_id)
+
+        # A socket left behind by a crashed process would make the bind fail
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+        self._server = await asyncio.start_unix_server(self._on_connection, path)
+
+    async def close(self) -> None:
+        for peer in self._peers.values():
+            peer.close()
+        self._peers.clear()
+
+        if self._server is not None:
+            self._server.close()
+
+            # Closing the connections lets their handlers see EOF and exit on their own
+            handlers = list(self._connections.values())
+            for writer in self._connections:
+                writer.close()
+            if handlers:
+                await asyncio.wait(handlers, timeout=self.timeout)
+
+            await self._server.wait_closed()
+            self._server = None
+
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path(self.cluster_id))
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, Mapping, Optional, TypeVar
+
+__all__: tuple[str, ...] = ("SingleFlightLoader",)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+log = logging.getLogger(__name__)
+
+
+class SingleFlightLoader(Generic[K, V]):
+    """Coalesces concurrent loads for the same key into a single database call
+
+    Every key requested during the same event loop iteration is collected and
+    handed to ``load_many`` in one batch, so a burst of cache misses costs one
+    ``WHERE id = ANY($1)`` query instead of one query per miss. Callers asking
+    for a key that is already in flight wait on the existing call.
+
+    Parameters
+    ----------
+    load_many : Callable[[list[K]], Awaitable[Mapping[K, V]]]
+        Loads a batch of keys. Keys missing from the returned mapping resolve to None.
+    max_batch_size : int, optional
+        The maximum number of keys passed to a single ``load_many`` call, by default 100
+    """
+
+    def __init__(
+        self,
+        load_many: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        *,
+        max_batch_size: int = 100,
+    ) -> None:
+        self._load_many = load_many
+        self.max_batch_size = max_batch_size
+
+        self._in_flight: dict[K, asyncio.Future[Optional[V]]] = {}
+        self._queue: list[K] = []
+        self._dispatch_scheduled = False
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._in_flight
+
+    async def load(self, key: K) -> Optional[V]:
+        """Load a single key, joining an in-flight call if there is one
+
+        Parameters
+        ----------
+        key : K
+            The key to load
+
+        Returns
+        -------
+        Optional[V]
+            The loaded value, or None if ``load_many`` didn't return the key
+        """
+        future = self._in_flight.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._in_flight[key] = loop.create_future()
+            self._queue.append(key)
+
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._dispatch)
+
+        # A cancelled waiter must not cancel the load for everyone else
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: list[K]) -> dict[K, Optional[V]]:
+        values = await asyncio.gather(*(self.load(key) for key in keys))
+        return dict(zip(keys, values))
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        keys, self._queue = self._queue, []
+
+        for i in range(0, len(keys), self.max_batch_size):
+            task = asyncio.create_task(self._run(keys[i : i + self.max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: list[K]) -> None:
+        try:
+            results = await self._load_many(keys)
+        except asyncio.CancelledError:
+            for key in keys:
+                self._in_flight.pop(key).cancel()
+            raise
+        except Exception as e:
+            log.debug(f"Batch load of {len(keys)} keys failed: {e!r}")
+            for key in keys:
+                future = self._in_flight.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+                    # Every waiter re-raises it; this only silences the warning if nobody is left
+                    future.exception()
+            return
+
+        for key in keys:
+            future = self._in_flight.pop(key)
+            if not future.done():
+                future.set_result(results.get(key))
@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Generic, Optional, Sequence, TypeVar
+
+import asyncpg
+from aiohttp import web
+
+from . import tracing
+
+if TYPE_CHECKING:
+    from discord.ext import commands
+
+    from ..main import Yuno
+
+
+__all__: tuple[str, ...] = (
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsServer",
+    "BotMetrics",
+    "TimedPool",
+    "create_timed_pool",
+)
+
+log = logging.getLogger(__name__)
+
+C = TypeVar("C")
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS: tuple[float, ...] = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+LAG_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not isinstance(value, int) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # One slot per bucket plus +Inf, counted individually and summed up on scrape
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric(Generic[C]):
+    type: str
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: dict[tuple[str, ...], tuple[str, C]] = {}
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> C:
+        """The series for these label values, created on first use
+
+        Look series up once and keep them; this builds a tuple on every call.
+        """
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} takes the labels {self.label_names}, got {values}")
+
+        if (entry := self._children.get(values)) is None:
+            entry = self._children[values] = (_format_labels(self.label_names, values), self._new_child())
+
+        return entry[1]
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    def _render_samples(self, lines: list[str]) -> None:
+        for labels, child in self._children.values():
+            lines.append(f"{self.name}{labels} {_format_value(child.value)}")  # type: ignore
+
+    def render(self, lines: list[str]) -> None:
+        lines.append(f"# HELP {self.name} {_escape(self.documentation)}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        self._render_samples(lines)
+
+
+class Counter(_Metric[CounterChild]):
+    type = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+
+class Gauge(_Metric[GaugeChild]):
+    type = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(_Metric[HistogramChild]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _render_samples(self, lines: list[str]) -> None:
+        for labels, child in self._children.values():
+            # The le label goes after the others
+            prefix = f"{labels[:-1]}," if labels else "{"
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{prefix}le="{_format_value(bound)}"}} {cumulative}')
+
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format
+
+    Collectors run before every render, for values that are cheaper to read
+    on scrape than to keep up to date, like pool sizes.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric[Any]] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric[C]) -> _Metric[C]:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))  # type: ignore
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))  # type: ignore
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets=buckets))  # type: ignore
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                log.error(f"Metrics collector {collector!r} failed: {e!r}")
+
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            metric.render(lines)
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+class TimedPool:
+    """An asyncpg pool that reports how long ``acquire`` waited for a connection, and traces it
+
+    Wraps the pool instead of subclassing it, so only its public API is used:
+    ``acquire`` times the wait around ``Pool.acquire``, and the query shortcuts
+    check their connection out through it too. Anything else, like
+    ``get_size`` or ``close``, is forwarded to the pool.
+
+    Parameters
+    ----------
+    pool : asyncpg.Pool
+        The pool to time
+    """
+
+    __slots__ = ("pool", "acquire_timer")
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self.pool = pool
+        self.acquire_timer: Optional[HistogramChild] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool, name)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, *, timeout: Optional[float] = None) -> AsyncIterator[asyncpg.Connection]:
+        timer = self.acquire_timer
+        started = time.perf_counter()
+        try:
+            with tracing.span("pool.acquire"):
+                conn = await self.pool.acquire(timeout=timeout)
+        finally:
+            if timer is not None:
+                timer.observe(time.perf_counter() - started)
+
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    async def execute(self, query: str, *args: Any, timeout: Optional[float] = None) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def executemany(self, command: str, args: Any, *, timeout: Optional[float] = None) -> None:
+        async with self.acquire() as conn:
+            return await conn.executemany(command, args, timeout=timeout)
+
+    async def fetch(self, query: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> list[Any]:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, column: int = 0, timeout: Optional[float] = None) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+
+async def create_timed_pool(dsn: str, **kwargs: Any) -> TimedPool:
+    """``asyncpg.create_pool``, wrapped in a ``TimedPool``"""
+    return TimedPool(await asyncpg.create_pool(dsn, **kwargs))
+
+
+class _CommandSeries:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self, latency: HistogramChild, errors: CounterChild) -> None:
+        self.latency = latency
+        self.errors = errors
+
+
+class BotMetrics:
+    """Every metric the bot exports
+
+    The hot paths only touch series that are looked up once and kept, so an
+    update is an attribute increment or a bisect into a preallocated list.
+    Everything that can be read off the bot, like pool and cache sizes or
+    shard latencies, is collected on scrape instead.
+
+    Parameters
+    ----------
+    bot : Yuno
+        The bot to collect from
+    lag_interval : float, optional
+        Seconds between event loop lag samples, by default 0.5
+    """
+
+    def __init__(self, bot: Yuno, *, lag_interval: float = 0.5) -> None:
+        self.bot = bot
+        self.lag_interval = lag_interval
+        self.registry = registry = MetricsRegistry()
+        self._task: Optional[asyncio.Task[None]] = None
+
+        self.command_latency = registry.histogram(
+            "yuno_command_duration_seconds",
+            "Time from invoking a command to its completion, including checks",
+            ("command", "cog"),
+        )
+        self.command_errors = registry.counter(
+            "yuno_command_errors_total",
+            "Invocations that failed, including failed checks",
+            ("command", "cog"),
+        )
+        self._commands: dict[str, _CommandSeries] = {}
+
+        self.prefix_latency = registry.histogram(
+            "yuno_get_prefix_duration_seconds", "Time spent resolving a message's prefix", buckets=FAST_BUCKETS
+        ).labels()
+
+        self.cache_requests = registry.counter("yuno_cache_requests_total", "Cache lookups", ("cache", "result"))
+        self.cache_hit_ratio = registry.gauge("yuno_cache_hit_ratio", "Cache hits over lookups", ("cache",))
+        self.cache_size = registry.gauge("yuno_cache_entries", "Entries in the cache", ("cache",))
+        self.guild_hits = self.cache_requests.labels("guild", "hit")
+        self.guild_misses = self.cache_requests.labels("guild", "miss")
+        self.prefix_hits = self.cache_requests.labels("prefix", "hit")
+        self.prefix_misses = self.cache_requests.labels("prefix", "miss")
+
+        self.pool_size = registry.gauge("yuno_pool_connections", "Open connections in the asyncpg pool", ("pool",))
+        self.pool_idle = registry.gauge("yuno_pool_idle_connections", "Idle connections in the asyncpg pool", ("pool",))
+        self.pool_max = registry.gauge("yuno_pool_max_connections", "The asyncpg pool's maximum size", ("pool",))
+        self.pool_acquire = registry.histogram(
+            "yuno_pool_acquire_duration_seconds",
+            "Time spent waiting for a connection from the asyncpg pool",
+            ("pool",),
+            buckets=FAST_BUCKETS + DEFAULT_BUCKETS[5:],
+        )
+
+        self.shard_latency = registry.gauge("yuno_gateway_latency_seconds", "Heartbeat latency of each shard", ("shard",))
+        self.loop_lag = registry.histogram(
+            "yuno_event_loop_lag_seconds", "How late the event loop ran a timer", buckets=LAG_BUCKETS
+        ).labels()
+
+        registry.add_collector(self._collect)
+
+    def command(self, command: commands.Command[Any, ..., Any]) -> _CommandSeries:
+        """The series of a command, keyed by its qualified name so reloaded cogs share them"""
+        if (series := self._commands.get(command.qualified_name)) is None:
+            labels = (command.qualified_name, command.cog_name or "")
+            series = self._commands[command.qualified_name] = _CommandSeries(
+                self.command_latency.labels(*labels), self.command_errors.labels(*labels)
+            )
+
+        return series
+
+    def instrument_pool(self, name: str, pool: asyncpg.Pool) -> None:
+        if isinstance(pool, TimedPool) and pool.acquire_timer is None:
+            pool.acquire_timer = self.pool_acquire.labels(name)
+
+    def _collect_pool(self, name: str, pool: asyncpg.Pool) -> None:
+        self.instrument_pool(name, pool)
+        self.pool_size.labels(name).set(pool.get_size())
+        self.pool_idle.labels(name).set(pool.get_idle_size())
+        self.pool_max.labels(name).set(pool.get_max_size())
+
+    def _collect_cache(self, name: str, hits: float, misses: float, size: int) -> None:
+        total = hits + misses
+        self.cache_hit_ratio.labels(name).set(hits / total if total else 0.0)
+        self.cache_size.labels(name).set(size)
+
+    def _collect(self) -> None:
+        bot = self.bot
+
+        stats = bot.user_cache.stats
+        self.cache_requests.labels("user", "hit").value = stats.hits
+        self.cache_requests.labels("user", "miss").value = stats.misses
+        self._collect_cache("user", stats.hits, stats.misses, stats.size)
+        self._collect_cache("guild", self.guild_hits.value, self.guild_misses.value, len(bot.cached_guilds))
+        self._collect_cache("prefix", self.prefix_hits.value, self.prefix_misses.value, len(bot.cached_prefixes))
+
+        self._collect_pool("primary", bot.pool)
+        for replica in bot.db.replicas:
+            if replica.pool is not None:
+                self._collect_pool(replica.host, replica.pool)
+
+        # Shards that are gone shouldn't keep reporting their last latency
+        self.shard_latency.clear()
+        for shard_id, latency in bot.latencies:
+            self.shard_latency.labels(str(shard_id)).set(latency)
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe(max(loop.time() - expected, 0.0))
+
+    def start(self) -> None:
+        self.instrument_pool("primary", self.bot.pool)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._measure_lag())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class MetricsServer:
+    """Serves a registry on ``/metrics`` with aiohttp
+
+    Parameters
+    ----------
+    registry : MetricsRegistry
+        The metrics to serve
+    host : str
+        The address to listen on
+    port : int
+        The port to listen on
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            await runner.cleanup()
+            log.error(f"Failed to serve metrics on {self.host}:{self.port}: {e!r}")
+            return
+
+        self._runner = runner
+        log.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
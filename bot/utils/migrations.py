@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import asyncpg
+
+__all__: tuple[str, ...] = ("Migration", "load_migrations", "apply_migrations")
+
+log = logging.getLogger(__name__)
+
+MIGRATION_DIRECTORY = Path(__file__).parent.parent / "sql"
+# Shared by every process that may migrate the same database
+MIGRATION_LOCK_ID = 0x59554E4F
+
+
+class Migration(NamedTuple):
+    name: str
+    checksum: str
+    sql: str
+
+
+def load_migrations(directory: Path = MIGRATION_DIRECTORY) -> list[Migration]:
+    """Read every ``*.sql`` file in the directory, in file name order"""
+    migrations: list[Migration] = []
+
+    for path in sorted(directory.glob("*.sql")):
+        sql = path.read_text(encoding="utf-8")
+        migrations.append(Migration(path.name, hashlib.sha256(sql.encode()).hexdigest(), sql))
+
+    return migrations
+
+
+async def _applied(conn: asyncpg.Connection) -> dict[str, str]:
+    records = await conn.fetch("SELECT filename, checksum FROM schema_migrations")
+    return {record["filename"]: record["checksum"] for record in records}
+
+
+def _pending(migrations: list[Migration], applied: dict[str, str]) -> list[Migration]:
+    return [migration for migration in migrations if applied.get(migration.name) != migration.checksum]
+
+
+async def apply_migrations(pool: asyncpg.pool.Pool, directory: Path = MIGRATION_DIRECTORY) -> list[Migration]:
+    """Run the migrations that haven't been applied yet
+
+    Applied files are recorded in ``schema_migrations`` with their checksum and
+    skipped from then on. A file whose checksum changed is run again, which is
+    why every migration has to stay idempotent. Each migration runs in its own
+    transaction, and the whole run holds an advisory lock so processes that
+    start at the same time apply every file once.
+
+    Parameters
+    ----------
+    pool : asyncpg.pool.Pool
+        The connection pool
+    directory : Path, optional
+        The directory of migrations, by default ``bot/sql``
+
+    Returns
+    -------
+    list[Migration]
+        The migrations that were applied
+    """
+    migrations = load_migrations(directory)
+
+    async with pool.acquire() as conn:
+        # Nothing to do is the common case, so check before taking any lock
+        try:
+            if not _pending(migrations, await _applied(conn)):
+                log.info(f"All {len(migrations)} migrations are up to date")
+                return []
+        except asyncpg.UndefinedTableError:
+            pass
+
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    filename TEXT PRIMARY KEY,
+                    checksum TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
+
+            # Another process may have applied some while we waited for the lock
+            applied = await _applied(conn)
+            pending = _pending(migrations, applied)
+
+            for n, migration in enumerate(pending, 1):
+                if migration.name in applied:
+                    log.warning(f"Migration {migration.name} changed since it was applied, running it again")
+
+                log.info(f"Running migration {n}/{len(pending)}: {migration.name}")
+                start = time.perf_counter()
+
+                async with conn.transaction():
+                    await conn.execute(migration.sql)
+                    await conn.execute(
+                        """
+                        INSERT INTO schema_migrations (filename, checksum) VALUES ($1, $2)
+                        ON CONFLICT (filename) DO UPDATE SET checksum = $2, applied_at = NOW()
+                        """,
+                        migration.name,
+                        migration.checksum,
+                    )
+
+                log.info(f"Applied {migration.name} in {time.perf_counter() - start:.2f}s")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    return pending
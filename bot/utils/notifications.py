@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Optional
+
+import asyncpg
+
+__all__: tuple[str, ...] = ("PostgresListener",)
+
+log = logging.getLogger(__name__)
+
+
+class PostgresListener:
+    """Keeps a dedicated connection subscribed to a ``NOTIFY`` channel
+
+    The connection lives outside the pool, so LISTEN survives pool resets.
+    If it drops, it is re-established with exponential backoff and
+    ``on_reconnect`` is called, since notifications sent while disconnected are lost.
+
+    Parameters
+    ----------
+    dsn : str
+        The database to connect to
+    channel : str
+        The channel to LISTEN on
+    callback : Callable[[str], Any]
+        Called with the payload of every notification
+    on_reconnect : Optional[Callable[[], Any]], optional
+        Called after the connection was re-established, by default None
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        callback: Callable[[str], Any],
+        *,
+        on_reconnect: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self.callback = callback
+        self.on_reconnect = on_reconnect
+
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def _on_notification(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.callback(payload)
+        except Exception as e:
+            log.error(f"Failed to handle notification {payload!r} on {channel}: {e!r}")
+
+    def _on_termination(self, conn: asyncpg.Connection) -> None:
+        if self._closed:
+            return
+
+        log.warning(f"Lost the LISTEN connection for {self.channel}, reconnecting")
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notification)
+        conn.add_termination_listener(self._on_termination)
+        self._conn = conn
+
+    async def _reconnect(self) -> None:
+        delay = 1.0
+        while not self._closed:
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError) as e:
+                log.warning(f"Reconnecting to {self.channel} failed, retrying in {delay:.0f}s: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+            else:
+                if self.on_reconnect is not None:
+                    self.on_reconnect()
+                return
+
+    async def start(self) -> None:
+        self._closed = False
+
+        try:
+            await self._connect()
+        except (OSError, asyncpg.PostgresError) as e:
+            log.warning(f"Could not LISTEN on {self.channel}, retrying in the background: {e!r}")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+        else:
+            log.info(f"Listening for notifications on {self.channel}")
+
+    async def close(self) -> None:
+        self._closed = True
+
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
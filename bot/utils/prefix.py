@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+__all__: tuple[str, ...] = ("PrefixIndex",)
+
+
+class PrefixIndex:
+    """Casefolded command prefixes per guild
+
+    Each guild maps to a tuple of casefolded prefixes sorted longest first, so
+    ``y!`` wins over ``y``. Matching compares a slice of the message with each
+    prefix, which avoids both regex matching and casefolding the whole message.
+
+    Parameters
+    ----------
+    default : Iterable[str], optional
+        The prefixes used in DMs and in guilds without any configured prefix, by default ("y",)
+    """
+
+    def __init__(self, default: Iterable[str] = ("y",)) -> None:
+        self.default: tuple[str, ...] = self._normalise(default)
+        self.mentions: list[str] = []
+        self._prefixes: dict[int, tuple[str, ...]] = {}
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._prefixes
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    @staticmethod
+    def _normalise(prefixes: Iterable[str]) -> tuple[str, ...]:
+        return tuple(sorted({prefix.casefold() for prefix in prefixes if prefix}, key=len, reverse=True))
+
+    def set_mentions(self, user_id: int) -> None:
+        """Precompute the mention prefixes once the bot user is known"""
+        self.mentions = [f"<@{user_id}> ", f"<@!{user_id}> "]
+
+    def get(self, guild_id: int) -> Optional[tuple[str, ...]]:
+        return self._prefixes.get(guild_id)
+
+    def set(self, guild_id: int, prefixes: Iterable[str]) -> tuple[str, ...]:
+        normalised = self._prefixes[guild_id] = self._normalise(prefixes) or self.default
+        return normalised
+
+    def add(self, guild_id: int, prefix: str) -> None:
+        current = self._prefixes.get(guild_id, ())
+        if current is self.default:
+            current = ()
+
+        self._prefixes[guild_id] = self._normalise((*current, prefix))
+
+    def remove(self, guild_id: int, prefix: str) -> None:
+        if (current := self._prefixes.get(guild_id)) is None:
+            return
+
+        folded = prefix.casefold()
+        self._prefixes[guild_id] = tuple(p for p in current if p != folded) or self.default
+
+    def invalidate(self, guild_id: int) -> None:
+        self._prefixes.pop(guild_id, None)
+
+    def clear(self) -> None:
+        self._prefixes.clear()
+
+    @staticmethod
+    def match(content: str, prefixes: tuple[str, ...]) -> Optional[str]:
+        """Find the prefix the message starts with
+
+        Returns
+        -------
+        Optional[str]
+            The prefix as it appears in the message, or None if nothing matched
+        """
+        for prefix in prefixes:
+            candidate = content[: len(prefix)]
+            if candidate == prefix or candidate.casefold() == prefix:
+                return candidate
+
+        return None
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Any, NamedTuple, Optional
+
+import asyncpg
+
+from . import tracing
+
+# The statements and fetch helpers are used through the module, e.g. ``queries.fetchrow(db, queries.GET_USER, ...)``
+__all__: tuple[str, ...] = ("Query", "QUERIES", "YunoConnection", "prepare_queries")
+
+Executor = asyncpg.Connection | asyncpg.pool.PoolConnectionProxy | asyncpg.Pool
+
+
+class Query(NamedTuple):
+    name: str
+    sql: str
+
+
+QUERIES: dict[str, Query] = {}
+"""Every statement that is prepared on each new connection, by name"""
+
+
+def _register(name: str, sql: str) -> Query:
+    query = QUERIES[name] = Query(name, " ".join(sql.split()))
+    return query
+
+
+GET_USER = _register("get_user", "SELECT * FROM users WHERE user_id = $1")
+GET_USERS = _register("get_users", "SELECT * FROM users WHERE user_id = ANY($1::bigint[])")
+ENSURE_USERS = _register(
+    "ensure_users",
+    """
+    WITH inserted AS (
+        INSERT INTO users (user_id)
+        SELECT unnest($1::bigint[])
+        ON CONFLICT (user_id)
+        DO NOTHING
+        RETURNING *
+    )
+    SELECT * FROM inserted
+    UNION ALL
+    SELECT * FROM users WHERE user_id = ANY($1::bigint[])
+    """,
+)
+GET_GUILD = _register("get_guild", "SELECT * FROM guilds WHERE guild_id = $1")
+GET_GUILDS = _register("get_guilds", "SELECT * FROM guilds WHERE guild_id = ANY($1::bigint[])")
+GET_GUILD_LOCALE = _register("get_guild_locale", "SELECT locale FROM guilds WHERE guild_id = $1")
+GET_PREFIXES = _register("get_prefixes", "SELECT guild_id, prefix FROM prefix WHERE guild_id = ANY($1::bigint[])")
+GET_ACTION_COUNT = _register(
+    "get_action_count",
+    "SELECT action_count FROM actions WHERE user_id = $1 AND target_id = $2 AND action_type = $3",
+)
+GET_ACTION_COUNTS = _register(
+    "get_action_counts",
+    """
+    SELECT a.user_id, a.target_id, a.action_type, a.action_count
+    FROM actions a
+    JOIN unnest($1::bigint[], $2::bigint[], $3::text[]) AS k (user_id, target_id, action_type)
+    USING (user_id, target_id, action_type)
+    """,
+)
+RECORD_ACTION = _register("record_action", "SELECT record_action($1, $2, $3, $4)")
+RATE_LIMIT_HIT = _register("rate_limit_hit", "SELECT rate_limit_hit($1, $2, $3)")
+
+
+class YunoConnection(asyncpg.Connection):
+    """A connection whose inline SQL shows up in traces
+
+    The registered queries are traced in ``_run``, with their name.
+    """
+
+    execute = tracing.traced_query(asyncpg.Connection.execute)
+    executemany = tracing.traced_query(asyncpg.Connection.executemany)
+    fetch = tracing.traced_query(asyncpg.Connection.fetch)
+    fetchrow = tracing.traced_query(asyncpg.Connection.fetchrow)
+    fetchval = tracing.traced_query(asyncpg.Connection.fetchval)
+
+
+async def prepare_queries(conn: asyncpg.Connection) -> None:
+    """Prepare every registered query on a new connection, for the pool's ``init`` hook
+
+    ``executemany`` with no arguments prepares the statement into asyncpg's
+    statement cache without running it, so the first real call on the
+    connection is a cache hit. Queries whose tables or functions don't exist
+    yet, because the migrations haven't run, are skipped here and prepared on
+    first use instead.
+    """
+    for query in QUERIES.values():
+        try:
+            await conn.executemany(query.sql, [])
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedFunctionError):
+            pass
+
+
+async def _run(db: Executor, query: Query, method: str, args: tuple[Any, ...]) -> Any:
+    if tracing.current_span() is None:
+        return await getattr(db, method)(query.sql, *args)
+
+    with tracing.span(f"db.{method}", {"db.statement": query.sql, "db.query": query.name}):
+        return await getattr(db, method)(query.sql, *args)
+
+
+async def fetch(db: Executor, query: Query, *args: Any) -> list[asyncpg.Record]:
+    return await _run(db, query, "fetch", args)
+
+
+async def fetchrow(db: Executor, query: Query, *args: Any) -> Optional[asyncpg.Record]:
+    return await _run(db, query, "fetchrow", args)
+
+
+async def fetchval(db: Executor, query: Query, *args: Any) -> Any:
+    return await _run(db, query, "fetchval", args)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Protocol, TypeVar
+
+import asyncpg
+from discord.ext import commands
+
+from . import queries, tracing
+
+if TYPE_CHECKING:
+    from discord.ext.commands import Context
+
+    from ..main import Yuno
+
+
+__all__: tuple[str, ...] = (
+    "RateLimitScope",
+    "RateLimitBackend",
+    "MemoryRateLimitBackend",
+    "PostgresRateLimitBackend",
+    "ratelimit",
+    "enforce_ratelimit",
+)
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Keeps rounding errors from rejecting the last request of a burst
+_EPSILON = 1e-6
+
+RateLimitKey = tuple[str, int]
+"""(qualified command name, user, guild or 0 for global limits)"""
+
+
+class RateLimitScope(Enum):
+    USER = commands.BucketType.user
+    GUILD = commands.BucketType.guild
+    GLOBAL = commands.BucketType.default
+
+    def get_id(self, ctx: Context[Any]) -> int:
+        if self is RateLimitScope.USER:
+            return ctx.author.id
+        if self is RateLimitScope.GUILD:
+            # Like discord.py's guild buckets, DMs are limited per user instead
+            return ctx.guild.id if ctx.guild is not None else ctx.author.id
+        return 0
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: RateLimitKey, interval: float, tolerance: float) -> float:
+        """Count a request against the key
+
+        Returns
+        -------
+        float
+            0 if the request is allowed, otherwise the seconds until it would be
+        """
+        ...
+
+    def start(self) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class MemoryRateLimitBackend:
+    """GCRA over one float per key, the theoretical arrival time of the next request
+
+    A key whose arrival time has passed is indistinguishable from one never
+    seen, so those are dropped by a sweep that runs at most every
+    ``sweep_interval`` seconds, piggybacking on ``hit``.
+
+    Parameters
+    ----------
+    sweep_interval : float, optional
+        The least time between sweeps, by default 60 seconds
+    """
+
+    def __init__(self, *, sweep_interval: float = 60.0) -> None:
+        self.sweep_interval = sweep_interval
+        self._arrivals: dict[RateLimitKey, float] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._arrivals)
+
+    def hit_now(self, key: RateLimitKey, interval: float, tolerance: float, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        arrival = self._arrivals.get(key, now)
+        if (retry_after := arrival - tolerance - now) > _EPSILON:
+            return retry_after
+
+        self._arrivals[key] = max(arrival, now) + interval
+        return 0.0
+
+    async def hit(self, key: RateLimitKey, interval: float, tolerance: float) -> float:
+        return self.hit_now(key, interval, tolerance)
+
+    def reset(self, key: RateLimitKey) -> None:
+        self._arrivals.pop(key, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every key whose arrival time has passed and return how many were dropped"""
+        now = time.monotonic() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+
+        expired = [key for key, arrival in self._arrivals.items() if arrival <= now]
+        for key in expired:
+            del self._arrivals[key]
+
+        return len(expired)
+
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresRateLimitBackend:
+    """GCRA shared by every process, kept in the unlogged ``rate_limits`` table
+
+    Each hit is one call to ``rate_limit_hit``, which updates the arrival time
+    atomically using the database clock, so processes with drifting clocks
+    still agree. Expired rows are deleted every ``sweep_interval`` seconds.
+
+    Parameters
+    ----------
+    pool : asyncpg.Pool
+        The pool of the primary
+    sweep_interval : float, optional
+        Seconds between deletions of expired rows, by default 60
+    """
+
+    def __init__(self, pool: asyncpg.Pool, *, sweep_interval: float = 60.0) -> None:
+        self.pool = pool
+        self.sweep_interval = sweep_interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def hit(self, key: RateLimitKey, interval: float, tolerance: float) -> float:
+        command, object_id = key
+        return await queries.fetchval(self.pool, queries.RATE_LIMIT_HIT, f"{command}:{object_id}", interval, tolerance)
+
+    async def sweep(self) -> int:
+        status = await self.pool.execute("DELETE FROM rate_limits WHERE tat <= EXTRACT(EPOCH FROM clock_timestamp())")
+        return int(status.rpartition(" ")[2])
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                log.error(f"Failed to sweep rate limits: {e!r}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class _RateLimit(NamedTuple):
+    interval: float
+    tolerance: float
+    cooldown: commands.Cooldown
+    scope: RateLimitScope
+
+
+def ratelimit(rate: int, per: float, scope: RateLimitScope = RateLimitScope.USER) -> Callable[[T], T]:
+    """A drop-in for ``commands.cooldown`` backed by ``bot.ratelimits``
+
+    Allows ``rate`` invocations every ``per`` seconds, per command and scope,
+    and raises ``commands.CommandOnCooldown`` otherwise. Unlike a fixed
+    window, requests are spread out: after a burst of ``rate``, one more is
+    allowed every ``per / rate`` seconds.
+
+    This only marks the command; requests are counted by
+    :func:`enforce_ratelimit` once the command is about to run, so checks
+    alone (as the help command runs them) don't use up the limit.
+
+    Parameters
+    ----------
+    rate : int
+        The number of invocations allowed in a burst
+    per : float
+        The length of the window in seconds
+    scope : RateLimitScope, optional
+        Whom the limit applies to, by default RateLimitScope.USER
+    """
+    interval = per / rate
+    limit = _RateLimit(interval, per - interval, commands.Cooldown(rate, per), scope)
+
+    def decorator(func: T) -> T:
+        # Kept on the callback, which cog instances share with their command copies
+        callback = getattr(func, "callback", func)
+        callback.__yuno_ratelimit__ = limit  # type: ignore
+        return func
+
+    return decorator
+
+
+async def enforce_ratelimit(ctx: Context[Yuno]) -> None:
+    """A ``before_invoke`` hook counting the invocation against the command's :func:`ratelimit`"""
+    limit: Optional[_RateLimit] = getattr(ctx.command and ctx.command.callback, "__yuno_ratelimit__", None)
+    if limit is None:
+        return
+
+    assert ctx.command is not None
+    key = (ctx.command.qualified_name, limit.scope.get_id(ctx))
+
+    with tracing.span("ratelimit"):
+        retry_after = await ctx.bot.ratelimits.hit(key, limit.interval, limit.tolerance)
+
+    if retry_after:
+        raise commands.CommandOnCooldown(limit.cooldown, retry_after, limit.scope.value)
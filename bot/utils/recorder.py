@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+import orjson
+
+__all__: tuple[str, ...] = (
+    "GatewayRecorder",
+    "RecordedEvent",
+    "read_recording",
+    "redact_payload",
+)
+
+log = logging.getLogger(__name__)
+
+REDACTED = "redacted"
+
+# Snowflakes, enums, bitfields and timestamps, which replaying needs to parse
+# the payload. Every other string is redacted, so new fields stay private;
+# that includes free-form fields that only look like IDs, such as custom_id,
+# nonce and session_id.
+KEPT_KEYS = frozenset(
+    {
+        # Snowflakes
+        "id",
+        "guild_id",
+        "channel_id",
+        "message_id",
+        "user_id",
+        "role_id",
+        "emoji_id",
+        "application_id",
+        "webhook_id",
+        "parent_id",
+        "owner_id",
+        "last_message_id",
+        "target_id",
+        "target_user_id",
+        "creator_id",
+        "integration_id",
+        "sku_id",
+        "bot_id",
+        "afk_channel_id",
+        "system_channel_id",
+        "rules_channel_id",
+        "public_updates_channel_id",
+        "safety_alerts_channel_id",
+        "widget_channel_id",
+        "guild_scheduled_event_id",
+        "roles",
+        "mention_roles",
+        "applied_tags",
+        # Enums and bitfields
+        "type",
+        "flags",
+        "permissions",
+        "app_permissions",
+        "allow",
+        "deny",
+        "features",
+        "status",
+        "locale",
+        "guild_locale",
+        "preferred_locale",
+        # Timestamps
+        "timestamp",
+        "edited_timestamp",
+        "joined_at",
+        "premium_since",
+        "communication_disabled_until",
+        "last_pin_timestamp",
+        "archive_timestamp",
+        "create_timestamp",
+        "request_to_speak_timestamp",
+        "scheduled_start_time",
+        "scheduled_end_time",
+        "expires_at",
+        "expiry",
+    }
+)
+
+_MENTION = re.compile(r"<(?:@[!&]?|#)\d+>")
+_VISIBLE = re.compile(r"\S")
+
+
+def _redact_text(content: str, keep: int = 0) -> str:
+    """Replace every visible character after ``keep`` with x, except for mentions
+
+    The length and word boundaries stay the same, so parsing costs about as
+    much as it did for the original message.
+    """
+    head, tail = content[:keep], content[keep:]
+    parts: list[str] = []
+    position = 0
+    for mention in _MENTION.finditer(tail):
+        parts.append(_VISIBLE.sub("x", tail[position : mention.start()]))
+        parts.append(mention.group(0))
+        position = mention.end()
+    parts.append(_VISIBLE.sub("x", tail[position:]))
+
+    return head + "".join(parts)
+
+
+def redact_payload(value: Any, keep_content: int = 0, *, kept: bool = False) -> Any:
+    """A copy of a gateway payload without names, message content or credentials
+
+    IDs, enums and timestamps (see ``KEPT_KEYS``) are kept, as replaying needs
+    the relations between users, channels and guilds; every other string is
+    replaced. ``keep_content`` characters of the top level ``content`` are
+    kept as they are, e.g. the prefix and name of a command. ``kept`` marks
+    ``value`` as the value of a kept key while recursing.
+    """
+    if isinstance(value, dict):
+        redacted: dict[str, Any] = {}
+        for key, item in value.items():
+            if key == "content" and isinstance(item, str):
+                redacted[key] = _redact_text(item, keep_content)
+            else:
+                redacted[key] = redact_payload(item, kept=key in KEPT_KEYS)
+        return redacted
+
+    if isinstance(value, list):
+        return [redact_payload(item, kept=kept) for item in value]
+
+    if isinstance(value, str) and not kept:
+        return REDACTED
+
+    return value
+
+
+class RecordedEvent(NamedTuple):
+    at: float
+    """Seconds since the recording started"""
+    event: str
+    data: Any
+
+
+class GatewayRecorder:
+    """Writes the gateway dispatches the bot receives to a gzipped JSON lines file
+
+    Each parser in ``ConnectionState.parsers``, which the websocket looks events
+    up in, is wrapped to queue a redacted copy of its payload before parsing it.
+    The copy is made right away, as parsers may modify the payload; encoding,
+    compressing and writing happen every ``flush_interval`` seconds in a thread.
+
+    Parameters
+    ----------
+    path : Path
+        The file to write, replaced if it exists
+    events : Optional[Iterable[str]], optional
+        The events to record, like MESSAGE_CREATE, by default all of them
+    command_length : Optional[Callable[[dict[str, Any]], int]], optional
+        How many characters of a MESSAGE_CREATE's content to keep, so commands still run on replay
+    flush_interval : float, optional
+        Seconds between writes, by default 1
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        events: Optional[Iterable[str]] = None,
+        command_length: Optional[Callable[[dict[str, Any]], int]] = None,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.events = frozenset(event.upper() for event in events) if events else None
+        self.command_length = command_length
+        self.flush_interval = flush_interval
+        self.recorded = 0
+
+        self._started = time.monotonic()
+        self._queue: list[RecordedEvent] = []
+        self._file: Optional[IO[bytes]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def install(self, parsers: dict[str, Callable[[Any], Any]]) -> None:
+        """Wrap the parsers in place, before the websocket connects"""
+        for event, parser in parsers.items():
+            if self.events is None or event in self.events:
+                parsers[event] = self._wrap(event, parser)
+
+    def _wrap(self, event: str, parser: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def record_and_parse(data: Any) -> Any:
+            self.record(event, data)
+            return parser(data)
+
+        return record_and_parse
+
+    def record(self, event: str, data: Any) -> None:
+        keep = 0
+        if event == "MESSAGE_CREATE" and self.command_length is not None:
+            keep = self.command_length(data)
+
+        self._queue.append(RecordedEvent(time.monotonic() - self._started, event, redact_payload(data, keep)))
+        self.recorded += 1
+
+    def _write(self, batch: list[RecordedEvent]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "wb")
+
+        self._file.write(b"".join(orjson.dumps(event._asdict()) + b"\n" for event in batch))
+        self._file.flush()
+
+    async def flush(self) -> None:
+        if not self._queue:
+            return
+
+        batch, self._queue = self._queue, []
+        await asyncio.to_thread(self._write, batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"Failed to write the gateway recording: {e!r}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            log.info(f"Recording gateway events to {self.path}")
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error(f"Failed to write the gateway recording on close: {e!r}")
+
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+            log.info(f"Recorded {self.recorded} gateway events to {self.path}")
+
+
+def read_recording(path: Path) -> Iterator[RecordedEvent]:
+    """The events of a recording made by ``GatewayRecorder``, in order
+
+    A process that was killed or crashed leaves a file without the gzip end
+    of stream marker, and maybe half a line; it's read up to the last
+    complete event.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    log.warning(f"{path} ends in the middle of an event, skipping it")
+                    return
+
+                if line.strip():
+                    yield RecordedEvent(**orjson.loads(line))
+        except (EOFError, zlib.error) as e:
+            log.warning(f"{path} was not closed properly, stopping at the last complete event: {e!r}")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Optional, Sequence
+
+import asyncpg
+
+__all__: tuple[str, ...] = ("DatabaseRouter",)
+
+log = logging.getLogger(__name__)
+
+# Zero once the replica has replayed everything it received, otherwise the age of the last replayed transaction
+REPLICATION_LAG_QUERY = """
+SELECT COALESCE(
+    CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp())
+    END,
+    0
+)::float8
+"""
+
+
+class _Replica:
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.pool: Optional[asyncpg.Pool] = None
+        self.lag: Optional[float] = None
+        """Seconds behind the primary, None while unreachable"""
+
+    @property
+    def host(self) -> str:
+        """The DSN without the credentials"""
+        return self.dsn.rpartition("@")[2]
+
+    def __repr__(self) -> str:
+        return f"<Replica {self.host} lag={self.lag}>"
+
+
+class DatabaseRouter:
+    """Sends reads that may be stale to a replica and everything else to the primary
+
+    Callers pick the pool explicitly: ``write()`` for writes and reads that must
+    see them, ``read()`` for reads that can be a few seconds behind. Replicas are
+    checked periodically; one that is down or lags more than ``max_lag`` seconds
+    is skipped, and ``read()`` falls back to the primary when none is usable.
+    Without replica DSNs, both return the primary.
+
+    Parameters
+    ----------
+    primary : asyncpg.Pool
+        The primary's pool
+    replica_dsns : Sequence[str]
+        The DSNs of the read replicas
+    connect : Callable[[str], Awaitable[asyncpg.Pool]]
+        Creates a pool for a DSN; replicas that are down are connected to on a later check
+    max_lag : float, optional
+        The most a replica may be behind before it's skipped, in seconds, by default 5
+    check_interval : float, optional
+        Seconds between health checks, by default 5
+    """
+
+    def __init__(
+        self,
+        primary: asyncpg.Pool,
+        replica_dsns: Sequence[str],
+        *,
+        connect: Callable[[str], Awaitable[asyncpg.Pool]],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+    ) -> None:
+        self.primary = primary
+        self.replicas = [_Replica(dsn) for dsn in replica_dsns]
+        self.connect = connect
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self._healthy: list[asyncpg.Pool] = []
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def write(self) -> asyncpg.Pool:
+        return self.primary
+
+    def read(self) -> asyncpg.Pool:
+        """A pool for reads that may be stale: a healthy replica if there is one, else the primary"""
+        if not self._healthy:
+            return self.primary
+
+        return self._healthy[next(self._next) % len(self._healthy)]
+
+    async def _check(self, replica: _Replica) -> None:
+        try:
+            if replica.pool is None:
+                replica.pool = await asyncio.wait_for(self.connect(replica.dsn), self.check_interval)
+
+            replica.lag = await replica.pool.fetchval(REPLICATION_LAG_QUERY, timeout=self.check_interval)
+        except Exception as e:
+            if replica.lag is not None:
+                log.warning(f"Replica {replica!r} is unreachable, reading from the primary: {e!r}")
+            replica.lag = None
+
+    async def check(self) -> None:
+        """Measure every replica's lag and update the set that reads are sent to"""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+        healthy = [r.pool for r in self.replicas if r.pool is not None and r.lag is not None and r.lag <= self.max_lag]
+        if len(healthy) != len(self._healthy):
+            log.info(f"Reading from {len(healthy)} of {len(self.replicas)} replicas: {self.replicas}")
+
+        self._healthy = healthy
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                log.error(f"Failed to check the replicas: {e!r}")
+
+    async def start(self) -> None:
+        """Check the replicas once, then keep checking them in the background"""
+        if not self.replicas:
+            return
+
+        await self.check()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._check_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self._healthy = []
+        pools = [replica.pool for replica in self.replicas if replica.pool is not None]
+        await asyncio.gather(*(pool.close() for pool in pools))
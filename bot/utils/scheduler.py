@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import defaultdict
+from typing import Optional
+
+import discord
+
+__all__: tuple[str, ...] = ("MessageDeleteScheduler",)
+
+log = logging.getLogger(__name__)
+
+
+class MessageDeleteScheduler:
+    """Deletes messages at a given time from a single background task
+
+    Entries live in a heap ordered by due time, so a temporary message costs a
+    tuple instead of a parked coroutine holding on to its command context.
+    Messages in the same channel that fall due within ``batch_window`` of each
+    other are removed with one bulk delete.
+
+    Parameters
+    ----------
+    batch_window : float, optional
+        Seconds by which a deletion may be brought forward to share a bulk call, by default 0.5
+    """
+
+    def __init__(self, *, batch_window: float = 0.5) -> None:
+        self.batch_window = batch_window
+
+        self._heap: list[tuple[float, int, discord.abc.Messageable, int]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, message: discord.Message, delay: float) -> None:
+        """Delete the message after ``delay`` seconds"""
+        due = asyncio.get_running_loop().time() + delay
+        entry = (due, next(self._counter), message.channel, message.id)
+
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def _pop_due(self, until: float) -> dict[discord.abc.Messageable, list[int]]:
+        due: defaultdict[discord.abc.Messageable, list[int]] = defaultdict(list)
+
+        while self._heap and self._heap[0][0] <= until:
+            _, _, channel, message_id = heapq.heappop(self._heap)
+            due[channel].append(message_id)
+
+        return due
+
+    @staticmethod
+    async def _delete(channel: discord.abc.Messageable, message_ids: list[int]) -> None:
+        # Bulk deletes need manage_messages and a guild channel; anything else goes one by one
+        if len(message_ids) > 1 and hasattr(channel, "delete_messages"):
+            try:
+                for i in range(0, len(message_ids), 100):
+                    chunk = message_ids[i : i + 100]
+                    await channel.delete_messages([discord.Object(id=message_id) for message_id in chunk])  # type: ignore
+                return
+            except discord.HTTPException as e:
+                log.debug(f"Bulk delete in {channel} failed, deleting one by one: {e!r}")
+
+        for message_id in message_ids:
+            try:
+                await channel.get_partial_message(message_id).delete()  # type: ignore
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                log.warning(f"Failed to delete message {message_id}: {e!r}")
+
+    async def _delete_all(self, due: dict[discord.abc.Messageable, list[int]]) -> None:
+        # A failure in one channel, e.g. a network error or one the bot has left, mustn't stop the others or the loop
+        results = await asyncio.gather(
+            *(self._delete(channel, message_ids) for channel, message_ids in due.items()), return_exceptions=True
+        )
+
+        for channel, result in zip(due, results):
+            if isinstance(result, Exception):
+                log.error(f"Failed to delete {len(due[channel])} messages in {channel}: {result!r}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._delete_all(self._pop_due(loop.time() + self.batch_window))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the scheduler and delete everything that is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self._delete_all(self._pop_due(float("inf")))
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import io
+import logging
+import pstats
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+__all__: tuple[str, ...] = ("PhaseTiming", "StartupTimer", "import_time_report")
+
+log = logging.getLogger(__name__)
+
+
+class PhaseTiming(NamedTuple):
+    name: str
+    started: float
+    """Seconds since the timer was created"""
+    elapsed: Optional[float]
+    """None while the phase is still running"""
+
+
+class StartupTimer:
+    """Records the wall time of each startup phase
+
+    Phases may overlap, so the report shows when each one started as well as
+    how long it took. With a profile directory, a cProfile run covers
+    everything from the creation of the timer until ``finish``.
+
+    Parameters
+    ----------
+    profile_directory : Optional[Path], optional
+        Where ``finish`` writes ``startup.prof`` and ``startup.txt``, by default no profiling
+    """
+
+    def __init__(self, profile_directory: Optional[Path] = None) -> None:
+        self.origin = time.perf_counter()
+        self.phases: dict[str, PhaseTiming] = {}
+        self.finished: Optional[float] = None
+        self.profile_directory = profile_directory
+
+        self._profiler: Optional[cProfile.Profile] = None
+        if profile_directory is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block, which may contain awaits"""
+        started = time.perf_counter() - self.origin
+        self.phases[name] = PhaseTiming(name, started, None)
+
+        try:
+            yield
+        finally:
+            self.phases[name] = PhaseTiming(name, started, time.perf_counter() - self.origin - started)
+
+    def report(self) -> str:
+        lines = [f"Startup took {self.finished or time.perf_counter() - self.origin:.2f}s:"]
+
+        for timing in sorted(self.phases.values(), key=lambda timing: timing.started):
+            elapsed = "running" if timing.elapsed is None else f"{timing.elapsed:.2f}s"
+            lines.append(f"  {timing.name:<14} +{timing.started:>6.2f}s  {elapsed}")
+
+        return "\n".join(lines)
+
+    def finish(self) -> None:
+        """Log the phase breakdown and write the profile; only the first call does anything"""
+        if self.finished is not None:
+            return
+
+        self.finished = time.perf_counter() - self.origin
+        log.info(self.report())
+
+        if self._profiler is not None and self.profile_directory is not None:
+            self._profiler.disable()
+            self.profile_directory.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(self.profile_directory / "startup.prof")
+
+            summary = io.StringIO()
+            pstats.Stats(self._profiler, stream=summary).sort_stats("cumulative").print_stats(50)
+            (self.profile_directory / "startup.txt").write_text(summary.getvalue(), encoding="utf-8")
+
+            log.info(f"Wrote the startup profile to {self.profile_directory}")
+            self._profiler = None
+
+
+def import_time_report(module: str, output: Path, top: int = 20) -> list[tuple[int, str]]:
+    """Import ``module`` in a fresh interpreter with ``-X importtime``
+
+    The raw output is written to ``output``.
+
+    Returns
+    -------
+    list[tuple[int, str]]
+        The ``top`` slowest imports by cumulative microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(result.stderr, encoding="utf-8")
+
+    # Lines look like "import time:       self [us] |  cumulative | imported package"
+    imports: list[tuple[int, str]] = []
+    for line in result.stderr.splitlines():
+        _, _, fields = line.partition("import time:")
+        parts = [part.strip() for part in fields.split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            imports.append((int(parts[1]), parts[2]))
+
+    return sorted(imports, reverse=True)[:top]
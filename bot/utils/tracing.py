@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextvars
+import functools
+import logging
+import random
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterator, Optional, Protocol, TypeVar
+
+import aiofiles
+import aiohttp
+import orjson
+
+if TYPE_CHECKING:
+    from discord.http import HTTPClient, Route
+
+
+__all__: tuple[str, ...] = (
+    "Span",
+    "Tracer",
+    "TraceExporter",
+    "JsonLinesExporter",
+    "OTLPExporter",
+    "current_span",
+    "span",
+    "traced_query",
+    "instrument_http",
+)
+
+log = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("yuno_span", default=None)
+
+
+class Span:
+    """A timed operation and the operations it waited on
+
+    Parameters
+    ----------
+    name : str
+        What was timed, e.g. ``get_prefix`` or ``db.fetchrow``
+    trace_id : int
+        The 128 bit id shared by every span of the trace
+    parent : Optional[Span]
+        The span this one is nested in, None for the root
+    attributes : Optional[dict[str, Any]]
+        Details about the operation, like the SQL statement
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent",
+        "start",
+        "end",
+        "attributes",
+        "children",
+        "error",
+        "discarded",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: int,
+        parent: Optional[Span] = None,
+        attributes: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64)
+        self.parent = parent
+        self.start = time.time_ns()
+        self.end: Optional[int] = None
+        self.attributes = attributes if attributes is not None else {}
+        self.children: list[Span] = []
+        self.error: Optional[str] = None
+        self.discarded = False
+
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self) -> str:
+        return f"<Span {self.name} {self.duration * 1e3:.3f}ms children={len(self.children)}>"
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end, or until now while the span is open"""
+        return ((self.end or time.time_ns()) - self.start) / 1e9
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def discard(self) -> None:
+        """Don't export the trace this span belongs to"""
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        root.discarded = True
+
+    def walk(self) -> Iterator[Span]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1e3, 3),
+        }
+        if self.parent is None:
+            data["trace_id"] = f"{self.trace_id:032x}"
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error is not None:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+
+        return data
+
+
+class _Scope:
+    __slots__ = ("span", "_token", "_on_end")
+
+    def __init__(self, span: Span, on_end: Optional[Callable[[Span], None]] = None) -> None:
+        self.span = span
+        self._on_end = on_end
+        self._token: Optional[contextvars.Token[Optional[Span]]] = None
+
+    def __enter__(self) -> Span:
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        self.span.end = time.time_ns()
+        if exc is not None:
+            self.span.error = repr(exc)
+
+        assert self._token is not None
+        _current.reset(self._token)
+
+        if self._on_end is not None:
+            self._on_end(self.span)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        pass
+
+
+_NOOP = _NoopScope()
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span, None outside of a sampled trace
+
+    Tasks started inside a trace inherit its context and may outlive it;
+    they don't add spans to a trace that has already ended.
+    """
+    if (current := _current.get()) is None or current.end is not None:
+        return None
+    return current
+
+
+def span(name: str, attributes: Optional[dict[str, Any]] = None) -> _Scope | _NoopScope:
+    """Time the block as a child of the current span
+
+    Outside of a sampled trace this is a context variable lookup returning a
+    shared no-op, so it can be left in hot paths. The block gets the new span,
+    or None when nothing is traced.
+    """
+    if (parent := current_span()) is None:
+        return _NOOP
+
+    return _Scope(Span(name, parent.trace_id, parent, attributes))
+
+
+def traced_query(method: F) -> F:
+    """Wrap an ``asyncpg.Connection`` query method in a ``db.<method>`` span"""
+    name = f"db.{method.__name__}"
+
+    @functools.wraps(method)
+    async def wrapper(self: Any, query: str, *args: Any, **kwargs: Any) -> Any:
+        # Registered queries already opened their own, named span in queries._run
+        if (parent := current_span()) is None or parent.name == name:
+            return await method(self, query, *args, **kwargs)
+
+        with _Scope(Span(name, parent.trace_id, parent, {"db.statement": query})):
+            return await method(self, query, *args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+def instrument_http(http: HTTPClient) -> None:
+    """Time every Discord API request made inside a trace
+
+    Wraps ``HTTPClient.request``, which every REST call, including ``send``,
+    goes through. The span covers waiting on rate limits as well as retries.
+    """
+    request = http.request
+
+    @functools.wraps(request)
+    async def traced_request(route: Route, **kwargs: Any) -> Any:
+        if current_span() is None:
+            return await request(route, **kwargs)
+
+        with span(f"http {route.method}", {"http.method": route.method, "http.route": route.path}):
+            return await request(route, **kwargs)
+
+    http.request = traced_request  # type: ignore
+
+
+class TraceExporter(Protocol):
+    def export(self, root: Span) -> None:
+        """Queue a finished trace, without blocking"""
+        ...
+
+    def start(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class _BufferedExporter:
+    """Queues traces and writes them in batches every ``flush_interval`` seconds
+
+    Once ``max_queue`` traces are waiting the oldest ones are dropped, so a
+    slow or unreachable destination can't grow the queue without bound.
+    """
+
+    def __init__(self, *, flush_interval: float = 5.0, max_queue: int = 10_000) -> None:
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: collections.deque[Span] = collections.deque(maxlen=max_queue)
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def export(self, root: Span) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(root)
+
+    async def _write(self, batch: list[Span]) -> None:
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        if not self._queue:
+            return
+
+        batch = list(self._queue)
+        self._queue.clear()
+        await self._write(batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"Failed to export traces: {e!r}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error(f"Failed to export traces on close: {e!r}")
+
+
+class JsonLinesExporter(_BufferedExporter):
+    """Appends each trace to a file as one line of JSON, with the spans nested
+
+    Parameters
+    ----------
+    path : Path
+        The file to append to
+    """
+
+    def __init__(self, path: Path, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+
+    async def _write(self, batch: list[Span]) -> None:
+        data = b"".join(orjson.dumps(root.to_dict()) + b"\n" for root in batch)
+        async with aiofiles.open(self.path, mode="ab") as f:
+            await f.write(data)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "traceId": f"{span.trace_id:032x}",
+        "spanId": f"{span.span_id:016x}",
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start),
+        "endTimeUnixNano": str(span.end or span.start),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error is not None else {},
+    }
+    if span.parent is not None:
+        data["parentSpanId"] = f"{span.parent.span_id:016x}"
+
+    return data
+
+
+class OTLPExporter(_BufferedExporter):
+    """Posts traces to an OpenTelemetry collector using OTLP/HTTP with JSON encoding
+
+    Parameters
+    ----------
+    endpoint : str
+        The collector's trace endpoint, usually ``http://host:4318/v1/traces``
+    service_name : str, optional
+        Reported as the ``service.name`` resource attribute, by default "yuno"
+    """
+
+    def __init__(self, endpoint: str, *, service_name: str = "yuno", **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def payload(self, batch: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}],
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "yuno"},
+                            "spans": [_otlp_span(span) for root in batch for span in root.walk()],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def _write(self, batch: list[Span]) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+
+        async with self._session.post(
+            self.endpoint,
+            data=orjson.dumps(self.payload(batch)),
+            headers={"Content-Type": "application/json"},
+        ) as response:
+            if response.status >= 400:
+                log.warning(f"Trace collector answered {response.status}: {await response.text()}")
+
+    async def close(self) -> None:
+        await super().close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class Tracer:
+    """Starts sampled traces and hands the finished ones to an exporter
+
+    Parameters
+    ----------
+    sample_rate : float
+        The fraction of traces that are recorded, from 0 (tracing off) to 1
+    exporter : Optional[TraceExporter]
+        Where finished traces go; tracing is off without one
+    """
+
+    def __init__(self, sample_rate: float, exporter: Optional[TraceExporter]) -> None:
+        self.sample_rate = sample_rate if exporter is not None else 0.0
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def _finish(self, root: Span) -> None:
+        if not root.discarded and self.exporter is not None:
+            self.exporter.export(root)
+
+    def trace(self, name: str, attributes: Optional[dict[str, Any]] = None) -> Optional[_Scope]:
+        """Start a trace if this one is sampled
+
+        Returns
+        -------
+        Optional[_Scope]
+            A context manager for the root span, exported when it exits, or None if not sampled
+        """
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return None
+
+        return _Scope(Span(name, random.getrandbits(128), None, attributes), self._finish)
+
+    def start(self) -> None:
+        if self.exporter is not None:
+            self.exporter.start()
+
+    async def close(self) -> None:
+        if self.exporter is not None:
+            await self.exporter.close()
@@ -17,7 +17,6 @@ from discord.ext.commands import Command as ExtCommand
 if TYPE_CHECKING:
     from discord.ext.commands import Context
 
-    from ..classes import YUser
     from ..classes import YEmbed
     from ..main import Yuno
 
@@ -33,7 +32,6 @@ __all__: tuple[str, ...] = (
     "module_ruleset",
     "MessagePreview",
     "FakeRecord",
-    "AsyncUserCache",
     "format_dt",
     "CaseInsensitiveDict",
 )
@@ -163,56 +161,6 @@ class FakeRecord:
             raise TypeError(f"Invalid index type: {type(index)}")
 
 
-class AsyncUserCache:
-    """A cache for storing user objects
-
-    Attributes
-    ----------
-    _cache : dict[int, YUser]
-        The cache of user objects
-    _lock : asyncio.Lock
-        The lock for the cache
-    """
-
-    def __init__(self) -> None:
-        self._cache: dict[int, YUser] = {}
-        self._lock = asyncio.Lock()
-
-    async def set_user(self, user: YUser) -> None:
-        async with self._lock:
-            self._cache[user.user_id] = user
-
-    async def get_users(self) -> list[YUser]:
-        async with self._lock:
-            return list(self._cache.values())
-
-    async def fetch_user(self, db: asyncpg.Connection, user_id: int) -> YUser:
-        async with self._lock:
-            if user_id not in self._cache:
-                await self.upsert_user(db, user_id)
-
-            return self._cache[user_id]
-
-    async def get_user(self, user_id: int) -> Optional[YUser]:
-        async with self._lock:
-            return self._cache.get(user_id)
-
-    async def upsert_user(self, db: asyncpg.Connection, user_id: int) -> YUser:
-        async with self._lock:
-            user = await YUser.upsert_user(db, user_id)
-
-            self._cache[user_id] = user
-
-            return user
-
-    async def insert_many(self, db: asyncpg.Connection, users: list[YUser]) -> None:
-        async with self._lock:
-            await YUser.insert_many(db, users)
-
-            for user in users:
-                self._cache[user.user_id] = user
-
-
 def format_dt(dt: datetime.datetime, style: Optional[str] = None) -> str:
     """Format a datetime object into a discord timestamp string
 
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import time
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional
+
+import asyncpg
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+__all__: tuple[str, ...] = (
+    "WarmupStats",
+    "stream_records",
+    "warm_from_query",
+    "peak_memory_mb",
+)
+
+
+class WarmupStats(NamedTuple):
+    table: str
+    rows: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.table}: {self.rows} rows in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+
+async def stream_records(
+    pool: asyncpg.Pool,
+    query: str,
+    *args: Any,
+    chunk_size: int = 1000,
+) -> AsyncIterator[list[asyncpg.Record]]:
+    """Stream the rows of a query through a server-side cursor
+
+    Only ``chunk_size`` rows are held in memory at a time. The connection is
+    taken from the pool for the whole iteration, so consume the iterator fully.
+
+    Parameters
+    ----------
+    pool : asyncpg.Pool
+        The pool to take a connection from
+    query : str
+        The query to run
+    chunk_size : int, optional
+        The number of rows per chunk, by default 1000
+
+    Yields
+    ------
+    list[asyncpg.Record]
+        The next chunk of rows
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor(query, *args)
+
+            while chunk := await cursor.fetch(chunk_size):
+                yield chunk
+
+
+async def warm_from_query(
+    pool: asyncpg.Pool,
+    table: str,
+    query: str,
+    *args: Any,
+    apply: Callable[[list[asyncpg.Record]], None],
+    chunk_size: int = 1000,
+) -> WarmupStats:
+    """Stream a query into a cache, one chunk at a time
+
+    Parameters
+    ----------
+    apply : Callable[[list[asyncpg.Record]], None]
+        Inserts a chunk of rows into the cache
+    """
+    rows = 0
+    start = time.perf_counter()
+
+    async for chunk in stream_records(pool, query, *args, chunk_size=chunk_size):
+        apply(chunk)
+        rows += len(chunk)
+
+    return WarmupStats(table, rows, time.perf_counter() - start)
+
+
+def peak_memory_mb() -> Optional[float]:
+    """The peak resident set size of the process, if the platform reports it"""
+    if resource is None:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
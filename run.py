@@ -1,7 +1,9 @@
 import argparse
 import asyncio
+import logging
 import os
 from contextlib import suppress
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -10,7 +12,72 @@ from bot.main import main as bot_starter_function
 load_dotenv()
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Yuno or one of its maintenance commands.")
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const=Path("startup-profile"),
+        type=Path,
+        default=None,
+        metavar="DIRECTORY",
+        help="Write an import-time and cProfile report of the startup, by default to ./startup-profile",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    assets = commands.add_parser("assets", help="Manage the bundled GIF assets")
+    asset_commands = assets.add_subparsers(dest="asset_command", required=True)
+
+    build = asset_commands.add_parser("build", help="Re-encode the GIFs into smaller variants")
+    build.add_argument("--force", action="store_true", help="Rebuild unchanged files too")
+    build.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    build.add_argument("--max-side", type=int, default=320, help="Maximum width and height in pixels")
+    build.add_argument("--colors", type=int, default=64, help="Palette size of the GIF variants")
+
+    cluster = commands.add_parser("cluster", help="Run the bot as several processes, splitting the shards between them")
+    cluster.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    cluster.add_argument("--shards", type=int, default=None, help="Total shard count, by default Discord's recommendation")
+
+    return parser.parse_args()
+
+
+def build_assets(args: argparse.Namespace) -> None:
+    from bot.asset_builder import build_assets
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    build_assets(max_side=args.max_side, colors=args.colors, workers=args.workers, force=args.force)
+
+
+def run_cluster(args: argparse.Namespace) -> None:
+    import discord
+
+    from bot.cluster import ClusterSupervisor
+    from bot.config import Config
+
+    discord.utils.setup_logging()
+    if not Config.TOKEN:
+        return logging.error("No token provided. Please set the DISCORD_TOKEN environment variable.")
+
+    ClusterSupervisor(Config.TOKEN, Config.get_dsn(), args.workers, shard_count=args.shards).run()
+
+
+def profile_imports(directory: Path) -> None:
+    from bot.utils import import_time_report
+
+    slowest = import_time_report("bot.main", directory / "importtime.txt")
+    lines = "\n".join(f"  {microseconds / 1000:>8.1f}ms  {module}" for microseconds, module in slowest)
+    print(f"Slowest imports (cumulative), full report in {directory / 'importtime.txt'}:\n{lines}")
+
+
 def main():
+    args = parse_args()
+
+    if args.command == "assets":
+        return build_assets(args)
+
+    if args.command == "cluster":
+        return run_cluster(args)
+
     print(
         f"""
        ▓██   ██▓ █    ██  ███▄    █  ▒█████ 
@@ -26,7 +93,10 @@ def main():
     """
     )
 
-    bot_starter_function()
+    if args.profile_startup is not None:
+        profile_imports(args.profile_startup)
+
+    bot_starter_function(profile_startup=args.profile_startup)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from bot.utils import GatewayRecorder, read_recording, redact_payload
+
+GUILD_ID = "336642139381301249"
+CHANNEL_ID = "381963689470984203"
+AUTHOR_ID = "80088516616269824"
+TARGET_ID = "159985870458322944"
+
+# Every string a user, another bot or Discord could have written
+FREE_TEXT = (
+    "hugs everyone in the channel",
+    "Danny",
+    "danny#0007",
+    "a_1269e74af4df7417b13759eae50c83dc",
+    "Welcome to the party!",
+    "Read the rules before posting",
+    "Rule one",
+    "Be nice to each other",
+    "Rule two",
+    "No spam, please",
+    "Rules bot v2",
+    "https://example.com/rules.png",
+    "https://example.com/rules",
+    "Which pizza is best?",
+    "Margherita",
+    "Pineapple",
+    "Accept the rules",
+    "Pick a colour",
+    "Red",
+    "the red role",
+    "Listening to a podcast",
+    "Episode 42: all about pizza",
+    "spotify:80088516616269824",
+    "cat.png",
+    "a cat sitting on a keyboard",
+    "nonce-1234567890",
+    "rules_accept",
+    "rules_colour",
+)
+
+
+def message_create() -> dict[str, Any]:
+    author = {
+        "id": AUTHOR_ID,
+        "username": "danny",
+        "global_name": "Danny",
+        "discriminator": "0007",
+        "avatar": "a_1269e74af4df7417b13759eae50c83dc",
+    }
+    return {
+        "id": "1183472538431651840",
+        "type": 0,
+        "guild_id": GUILD_ID,
+        "channel_id": CHANNEL_ID,
+        "content": f"y pat <@{TARGET_ID}> hugs everyone in the channel",
+        "timestamp": "2024-02-18T12:00:00.000000+00:00",
+        "edited_timestamp": None,
+        "nonce": "nonce-1234567890",
+        "flags": 0,
+        "author": author,
+        "member": {"nick": "danny#0007", "roles": ["381978546123440130"], "joined_at": "2017-11-21T10:00:00+00:00"},
+        "mentions": [{"id": TARGET_ID, "username": "Welcome to the party!", "avatar": None}],
+        "mention_roles": [],
+        "attachments": [
+            {
+                "id": "1183472538234523648",
+                "filename": "cat.png",
+                "description": "a cat sitting on a keyboard",
+                "content_type": "image/png",
+                "size": 1024,
+                "url": "https://example.com/rules.png",
+                "proxy_url": "https://example.com/rules.png",
+            }
+        ],
+        "embeds": [
+            {
+                "type": "rich",
+                "title": "Read the rules before posting",
+                "url": "https://example.com/rules",
+                "timestamp": "2024-02-18T12:00:00.000000+00:00",
+                "color": 0xF25D9C,
+                "fields": [
+                    {"name": "Rule one", "value": "Be nice to each other", "inline": False},
+                    {"name": "Rule two", "value": "No spam, please", "inline": False},
+                ],
+                "footer": {"text": "Rules bot v2", "icon_url": "https://example.com/rules.png"},
+                "author": {"name": "Danny", "url": "https://example.com/rules"},
+            }
+        ],
+        "poll": {
+            "question": {"text": "Which pizza is best?"},
+            "answers": [
+                {"answer_id": 1, "poll_media": {"text": "Margherita"}},
+                {"answer_id": 2, "poll_media": {"text": "Pineapple"}},
+            ],
+            "expiry": "2024-02-19T12:00:00.000000+00:00",
+            "allow_multiselect": False,
+            "layout_type": 1,
+        },
+        "components": [
+            {
+                "type": 1,
+                "components": [
+                    {"type": 2, "style": 1, "label": "Accept the rules", "custom_id": "rules_accept"},
+                    {
+                        "type": 3,
+                        "custom_id": "rules_colour",
+                        "placeholder": "Pick a colour",
+                        "options": [{"label": "Red", "value": "red", "description": "the red role"}],
+                    },
+                ],
+            }
+        ],
+        "activity": {"type": 3, "party_id": "spotify:80088516616269824"},
+        "application": {
+            "id": "270904126974590976",
+            "name": "Listening to a podcast",
+            "description": "Episode 42: all about pizza",
+            "icon": None,
+            "cover_image": None,
+        },
+    }
+
+
+def test_redact_payload_removes_free_text() -> None:
+    redacted = orjson.dumps(redact_payload(message_create(), len("y pat "))).decode()
+
+    for text in FREE_TEXT:
+        assert text not in redacted
+
+
+def test_redact_payload_keeps_what_replaying_needs() -> None:
+    redacted = redact_payload(message_create(), len("y pat "))
+
+    assert redacted["id"] == "1183472538431651840"
+    assert redacted["guild_id"] == GUILD_ID
+    assert redacted["channel_id"] == CHANNEL_ID
+    assert redacted["author"]["id"] == AUTHOR_ID
+    assert redacted["member"]["roles"] == ["381978546123440130"]
+    assert redacted["timestamp"] == "2024-02-18T12:00:00.000000+00:00"
+    assert redacted["embeds"][0]["type"] == "rich"
+    assert redacted["poll"]["expiry"] == "2024-02-19T12:00:00.000000+00:00"
+    # The command and its mention still parse, the rest keeps its shape
+    assert redacted["content"] == f"y pat <@{TARGET_ID}> xxxx xxxxxxxx xx xxx xxxxxxx"
+
+
+def test_redact_payload_drops_credentials() -> None:
+    ready = {
+        "v": 10,
+        "session_id": "d5cc2e4b7a2f6c1d",
+        "resume_gateway_url": "wss://gateway-us-east1-b.discord.gg",
+        "user": {"id": AUTHOR_ID, "username": "yuno", "email": "yuno@example.com"},
+        "guilds": [{"id": GUILD_ID, "unavailable": True}],
+    }
+
+    redacted = orjson.dumps(redact_payload(ready)).decode()
+
+    for secret in ("d5cc2e4b7a2f6c1d", "gateway-us-east1-b", "yuno@example.com"):
+        assert secret not in redacted
+    assert GUILD_ID in redacted
+
+
+def test_read_recording_stops_at_the_end_of_an_unclosed_file(tmp_path: Path) -> None:
+    path = tmp_path / "recording.jsonl.gz"
+    recorder = GatewayRecorder(path)
+    sizes: list[int] = []
+
+    async def record() -> None:
+        for guild_id in range(3):
+            recorder.record("GUILD_CREATE", {"id": str(guild_id), "name": "x" * 50})
+            await recorder.flush()
+            sizes.append(path.stat().st_size)
+
+    asyncio.run(record())
+    # What a killed worker leaves behind: the flushed batches, but no gzip trailer
+    killed = tmp_path / "killed.jsonl.gz"
+    killed.write_bytes(path.read_bytes())
+    # And one killed while writing the last batch
+    cut = tmp_path / "cut.jsonl.gz"
+    cut.write_bytes(path.read_bytes()[: (sizes[1] + sizes[2]) // 2])
+
+    assert [event.data["id"] for event in read_recording(killed)] == ["0", "1", "2"]
+    assert [event.data["id"] for event in read_recording(cut)] == ["0", "1"]